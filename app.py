@@ -1,18 +1,148 @@
-import io
+import json
 import os
 import tempfile
+import time
 import pandas as pd
-from flask import Flask, request, render_template, jsonify, send_file
-from checker_logic import validate_catalog_file
+from flask import Flask, Response, request, render_template, jsonify, send_file, stream_with_context
+from checker_logic import MODE_RULES, column_plan, duplicate_errors, load_catalog
+from checker_logic_old import unreadable_file_errors
+from catalog_cache import CatalogCache
+from catalog_stream import estimate_rows, iter_error_batches
+from incremental import diff_issues, revalidate, row_fingerprints
+from identifier_history import IdentifierHistory, catalog_identifiers
+from jobs import JobQueue, QueueFull
+from metrics import CHECKS, ERRORS, REQUEST_SECONDS, ROWS, UPLOAD_BYTES, render as render_metrics, request_timings, timed
+from parallel_check import PARALLEL_MIN_ROWS, archive_catalogs, validate_catalog_frame_parallel, validate_catalogs_parallel
+from result_store import ResultStore, error_report_file
+from rule_engine import merge_by_row, shared_cells
+from uploads import UploadRequest, save_upload, take_upload, upload_stream
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
 
+# Uploads: largest request accepted (413 beyond it), bytes of a file kept in memory before it spools to UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get("MAX_CONTENT_LENGTH", 2**30))
+app.config['UPLOAD_SPOOL_BYTES'] = int(os.environ.get("UPLOAD_SPOOL_BYTES", 2**20))
+
+# Background checks (/jobs): worker processes, max queued+running jobs, seconds results are kept
+app.config['JOB_WORKERS'] = int(os.environ.get("JOB_WORKERS", 2))
+app.config['JOB_QUEUE_DEPTH'] = int(os.environ.get("JOB_QUEUE_DEPTH", 8))
+app.config['JOB_RESULT_TTL'] = int(os.environ.get("JOB_RESULT_TTL", 3600))
+
+# Multi-core checks for /check_catalog: worker processes (1 = in-process) and the row count worth splitting
+app.config['CHECK_WORKERS'] = int(os.environ.get("CHECK_WORKERS", 1))
+app.config['PARALLEL_MIN_ROWS'] = int(os.environ.get("PARALLEL_MIN_ROWS", PARALLEL_MIN_ROWS))
+
+# Parsed-catalog cache keyed by upload hash: bytes kept in memory, bytes spilled to UPLOAD_FOLDER
+app.config['CATALOG_CACHE_BYTES'] = int(os.environ.get("CATALOG_CACHE_BYTES", 512 * 2**20))
+app.config['CATALOG_CACHE_SPILL_BYTES'] = int(os.environ.get("CATALOG_CACHE_SPILL_BYTES", 2 * 2**30))
+
+# Zip batches (/check_batch): worker processes (0 = CPU count), max catalogs and uncompressed bytes per archive
+app.config['BATCH_WORKERS'] = int(os.environ.get("BATCH_WORKERS", 0))
+app.config['BATCH_MAX_FILES'] = int(os.environ.get("BATCH_MAX_FILES", 100))
+app.config['BATCH_MAX_BYTES'] = int(os.environ.get("BATCH_MAX_BYTES", 2 * 2**30))
+
+# Seconds check results stay downloadable by result id
+app.config['RESULT_TTL'] = int(os.environ.get("RESULT_TTL", 3600))
+
+# Most errors /results/<id> returns per page
+app.config['RESULTS_PAGE_MAX'] = int(os.environ.get("RESULTS_PAGE_MAX", 1000))
+
+# SQLite index of ISWC/ISRC/UPC from earlier checks, for cross-catalog duplicates.
+# Off unless set; uploads only take part when they name their "source".
+app.config['IDENTIFIER_DB'] = os.environ.get("IDENTIFIER_DB", "")
+
+RESULTS_PAGE_SIZE = 100
+
+_job_queue = None
+_catalog_cache = None
+_result_store = None
+_identifier_history = None
+
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            max_workers=app.config['JOB_WORKERS'],
+            max_pending=app.config['JOB_QUEUE_DEPTH'],
+            result_ttl=app.config['JOB_RESULT_TTL'],
+        )
+    return _job_queue
+
+
+def get_catalog_cache():
+    global _catalog_cache
+    if _catalog_cache is None:
+        _catalog_cache = CatalogCache(
+            max_bytes=app.config['CATALOG_CACHE_BYTES'],
+            spill_dir=os.path.join(app.config['UPLOAD_FOLDER'], "ebichecker_catalog_cache"),
+            max_spill_bytes=app.config['CATALOG_CACHE_SPILL_BYTES'],
+        )
+    return _catalog_cache
+
+
+def get_result_store():
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore(
+            os.path.join(app.config['UPLOAD_FOLDER'], "ebichecker_results"),
+            ttl=app.config['RESULT_TTL'],
+        )
+    return _result_store
+
+
+def get_identifier_history(check_type, source):
+    """The identifier history, or None if it is off, no source is given or check_type reads no identifiers."""
+    global _identifier_history
+    if not app.config['IDENTIFIER_DB'] or not source or "duplicates" not in MODE_RULES.get(check_type, []):
+        return None
+    if _identifier_history is None:
+        _identifier_history = IdentifierHistory(app.config['IDENTIFIER_DB'])
+    return _identifier_history
+
+
 @app.route("/", methods=["GET"])
 def index():
     return render_template("index.html")
 
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({"error": f"Upload is over the limit of {app.config['MAX_CONTENT_LENGTH']} bytes"}), 413
+
+def _wants_timings():
+    # per-request timing breakdown, opt-in with timings=1 (form field or query string)
+    return request.values.get("timings", "").lower() in ("1", "true", "yes")
+
+
+def _wants_summary():
+    # counts by rule instead of every error, opt-in with summary=1
+    return request.values.get("summary", "").lower() in ("1", "true", "yes")
+
+
+def _mode_label(check_type):
+    # check_type comes from the client: unknown modes share one label so
+    # they cannot add metric series without bound
+    return check_type if check_type in MODE_RULES else "unknown"
+
+
+def _covering_variants(check_type):
+    # the all-in-one column plan holds the columns of every mode, so a
+    # catalog read for it can serve the others
+    if check_type == "ALL IN ONE":
+        return []
+    return [column_plan("ALL IN ONE").name]
+
+
+def _observe_check(endpoint, check_type, status, started):
+    CHECKS.inc(endpoint=endpoint, mode=_mode_label(check_type), status=status)
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, mode=_mode_label(check_type))
+
+
 @app.route("/check_catalog", methods=["POST"])
 def check_catalog():
     if "catalog_file" not in request.files:
@@ -20,52 +150,423 @@ def check_catalog():
 
     check_type = request.form.get("check_type", "ALL IN ONE")
     file = request.files["catalog_file"]
+    # result_id of an earlier check of this catalog: only changed rows are re-checked
+    baseline_id = request.form.get("baseline_result_id")
+    # catalogs of the same source (e.g. a label) replace each other in the
+    # identifier history; without one the upload is not checked against it
+    source = request.form.get("source")
+    store = get_result_store()
+    if baseline_id and store.meta(baseline_id) is None:
+        return jsonify({"error": "Unknown or expired baseline result"}), 404
+    started = time.perf_counter()
 
-    try:
-        file_buffer = io.BytesIO(file.read())
-        errors = validate_catalog_file(file_buffer, check_mode=check_type)
+    with request_timings() as timings:
+        try:
+            with timed("upload_read"):
+                # spooled to disk as it arrived; parsed in place, never copied
+                upload, key, size = upload_stream(file)
+            UPLOAD_BYTES.inc(size, endpoint="check_catalog")
+            fingerprints, rechecked = None, 0
+
+            try:
+                # identical uploads reuse the parsed catalog; single-purpose modes
+                # parse only their columns, and reuse a full parse if there is one
+                df = get_catalog_cache().load(
+                    upload,
+                    parse=lambda buf: load_catalog(buf, check_type),
+                    variant=None if check_type == "ALL IN ONE" else column_plan(check_type).name,
+                    key=key,
+                    covering=_covering_variants(check_type),
+                )
+            except Exception as e:
+                if check_type != "ALL IN ONE":
+                    raise
+                errors = unreadable_file_errors(e)
+            else:
+                # every check of this request (and of this cached catalog, in any
+                # mode) shares one normalized view of its cells
+                cache = get_catalog_cache()
+                with shared_cells(cache.cells(df)):
+                    validate = lambda frame, cross_row=True: validate_catalog_frame_parallel(
+                        frame,
+                        check_mode=check_type,
+                        workers=app.config['CHECK_WORKERS'],
+                        min_rows=app.config['PARALLEL_MIN_ROWS'],
+                        cross_row=cross_row,
+                    )
+                    with timed("fingerprint"):
+                        fingerprints = row_fingerprints(df, check_type)
+                    with timed("check"):
+                        if baseline_id:
+                            # re-check only rows changed since the baseline result;
+                            # duplicates depend on every row, so they are always checked
+                            errors, rechecked = revalidate(
+                                df, check_type, fingerprints, lambda frame: validate(frame, cross_row=False),
+                                baseline_rows=store.rows(baseline_id),
+                                baseline_errors=store.table(baseline_id),
+                            )
+                            errors = merge_by_row(errors, duplicate_errors(df, check_type))
+                        else:
+                            errors, rechecked = validate(df), len(df)
+                    history = get_identifier_history(check_type, source)
+                    if history is not None:
+                        # identifiers already used by other catalogs, then this one's are kept
+                        with timed("history"):
+                            found = catalog_identifiers(df)
+                            errors = merge_by_row(errors, history.collisions(df, source, found))
+                            history.record(found, source)
+                cache.refresh(df)
+                ROWS.inc(rechecked, mode=_mode_label(check_type))
+            ERRORS.inc(len(errors), mode=_mode_label(check_type))
+
+            # kept server-side so the report can be downloaded by id, and
+            # with row fingerprints so it can be the baseline of a re-check
+            with timed("store"):
+                result_id = store.save(errors, filename=file.filename, check_mode=check_type, rows=fingerprints)
+
+            if errors and _wants_summary():
+                # counts by rule only; the errors are paged through /results/<result_id>
+                body = {"status": "issues_found", "summary": errors.summary(), "result_id": result_id}
+            elif errors:
+                body = {"status": "issues_found", "errors": errors.dicts(), "result_id": result_id}
+            else:
+                body = {"status": "success", "message": f"No errors found for {check_type}!", "result_id": result_id}
+            if baseline_id:
+                changes = diff_issues(store.table(baseline_id) or [], errors)
+                changes.update({"baseline_result_id": baseline_id, "rows_rechecked": rechecked})
+                body["changes"] = changes
+            if _wants_timings():
+                # everything up to the response itself, which is serialized below
+                body["timings"] = timings
+
+            with timed("serialize"):
+                response = jsonify(body)
+            _observe_check("check_catalog", check_type, body["status"], started)
+            return response
+
+        except Exception as e:
+            _observe_check("check_catalog", check_type, "error", started)
+            return jsonify({"error": str(e)}), 500
+
+
+@app.route("/check_catalog_stream", methods=["POST"])
+def check_catalog_stream():
+    """
+    Same check as /check_catalog, streamed as NDJSON while rows are validated:
+      {"event": "start", "total": <estimated rows or null>}
+      {"event": "progress", "rows": <rows checked>, "total": ..., "issues": <found so far>}
+      {"event": "errors", "errors": [...]}      (one per batch with issues, unless summary=1)
+      {"event": "done", "status": ..., "count": <issues>, "result_id": ..., "message": ...,
+       "summary": {...}, "timings": {...}}      (summary and timings only when requested)
+      {"event": "error", "error": ...}          (validation failed mid-way)
+    """
+    if "catalog_file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    check_type = request.form.get("check_type", "ALL IN ONE")
+    file = request.files["catalog_file"]
+    started = time.perf_counter()
+    want_timings = _wants_timings()
+    want_summary = _wants_summary()
+
+    with request_timings() as timings:
+        with timed("upload_read"):
+            # read by the response generator, after the request's files are closed
+            file_buffer, key, size = take_upload(file)
+    UPLOAD_BYTES.inc(size, endpoint="check_catalog_stream")
+    # a catalog checked before (in any mode that read its columns) is
+    # batched from the cache; otherwise it is read as it is checked and
+    # cached once the check completes
+    cache = get_catalog_cache()
+    variant = column_plan(check_type).name
+    cached = cache.find(key, _covering_variants(check_type) + [variant])
+    total = estimate_rows(file_buffer) if cached is None else len(cached)
+    read = [] if cached is None else None
+
+    def _line(payload):
+        return json.dumps(payload) + "\n"
+
+    result = get_result_store().writer(filename=file.filename, check_mode=check_type)
+
+    source = request.form.get("source")
+    history = get_identifier_history(check_type, source)
+    found = []
+
+    def history_errors(batch):
+        with timed("history"):
+            batch_found = catalog_identifiers(batch)
+            found.extend(batch_found)
+            return history.collisions(batch, source, batch_found)
+
+    def generate():
+        with request_timings(timings), file_buffer:
+            yield _line({"event": "start", "total": total})
+            rows_checked = 0
+            try:
+                batches = iter_error_batches(
+                    file_buffer if cached is None else cached,
+                    check_type,
+                    extra_errors=history_errors if history is not None else None,
+                    keep=read,
+                )
+                for rows_checked, errors in batches:
+                    if errors:
+                        result.add(errors)
+                        if not want_summary:
+                            yield _line({"event": "errors", "errors": errors.dicts()})
+                    yield _line({"event": "progress", "rows": rows_checked, "total": total, "issues": result.count})
+            except GeneratorExit:
+                # client went away mid-check
+                result.discard()
+                _observe_check("check_catalog_stream", check_type, "cancelled", started)
+                raise
+            except Exception as e:
+                result.discard()
+                _observe_check("check_catalog_stream", check_type, "error", started)
+                yield _line({"event": "error", "error": str(e)})
+                return
+            result.close()
+            if read:
+                cache.put(f"{key}.{variant}", pd.concat(read))
+            if history is not None:
+                history.record(found, source)
+            ROWS.inc(rows_checked, mode=_mode_label(check_type))
+            ERRORS.inc(result.count, mode=_mode_label(check_type))
 
-        if errors:
-            return jsonify({"status": "issues_found", "errors": errors})
-        return jsonify({"status": "success", "message": f"No errors found for {check_type}!"})
+            done = {"event": "done", "count": result.count, "result_id": result.result_id}
+            if result.count:
+                done["status"] = "issues_found"
+            else:
+                done.update({"status": "success", "message": f"No errors found for {check_type}!"})
+            if want_summary:
+                done["summary"] = result.summary()
+            if want_timings:
+                done["timings"] = timings
+            _observe_check("check_catalog_stream", check_type, done["status"], started)
+            yield _line(done)
 
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/check_batch", methods=["POST"])
+def check_batch():
+    """
+    Check every catalog in a zip archive (field catalog_archive), several
+    at a time. Returns per-file results and a result_id whose report has
+    one sheet per file:
+      {"status": ..., "count": <issues>, "result_id": ...,
+       "files": [{"file", "status", "count", "errors" (or "summary"), "error"?}, ...]}
+    """
+    if "catalog_archive" not in request.files:
+        return jsonify({"error": "No archive uploaded"}), 400
+
+    check_type = request.form.get("check_type", "ALL IN ONE")
+    archive = request.files["catalog_archive"]
+    started = time.perf_counter()
+
+    with request_timings() as timings:
+        try:
+            with timed("upload_read"):
+                data, _, size = upload_stream(archive)
+            UPLOAD_BYTES.inc(size, endpoint="check_batch")
+
+            # catalogs are extracted to files the workers read themselves
+            with tempfile.TemporaryDirectory(prefix="ebichecker_batch_", dir=app.config['UPLOAD_FOLDER']) as tmp:
+                try:
+                    files = archive_catalogs(
+                        data,
+                        max_files=app.config['BATCH_MAX_FILES'],
+                        max_bytes=app.config['BATCH_MAX_BYTES'],
+                        directory=tmp,
+                    )
+                except ValueError as e:
+                    _observe_check("check_batch", check_type, "rejected", started)
+                    return jsonify({"error": str(e)}), 400
+
+                with timed("check"):
+                    results = validate_catalogs_parallel(
+                        files,
+                        check_mode=check_type,
+                        workers=app.config['BATCH_WORKERS'] or None,
+                    )
+            count = sum(r["count"] for r in results)
+            ERRORS.inc(count, mode=_mode_label(check_type))
+
+            with timed("store"):
+                result = get_result_store().writer(
+                    filename=archive.filename,
+                    check_mode=check_type,
+                    files=[r["file"] for r in results],
+                )
+                for r in results:
+                    result.add(r["errors"], file=r["file"])
+                result.close()
+
+            if any(r["status"] == "failed" for r in results):
+                status = "failed"
+            elif count:
+                status = "issues_found"
+            else:
+                status = "success"
+            # with summary=1, counts by rule per file instead of its errors
+            files = []
+            for r in results:
+                errors = r.pop("errors")
+                r.update({"summary": errors.summary()} if _wants_summary() else {"errors": errors.dicts()})
+                files.append(r)
+            body = {"status": status, "count": count, "result_id": result.result_id, "files": files}
+            if _wants_timings():
+                body["timings"] = timings
+
+            with timed("serialize"):
+                response = jsonify(body)
+            _observe_check("check_batch", check_type, status, started)
+            return response
+
+        except Exception as e:
+            _observe_check("check_batch", check_type, "error", started)
+            return jsonify({"error": str(e)}), 500
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queue a catalog check; poll GET /jobs/<job_id> for the result."""
+    if "catalog_file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    check_type = request.form.get("check_type", "ALL IN ONE")
+    file = request.files["catalog_file"]
+
+    # the worker process reads (and then deletes) its own copy of the upload
+    path = save_upload(file, app.config['UPLOAD_FOLDER'])
+    UPLOAD_BYTES.inc(os.path.getsize(path), endpoint="jobs")
+    try:
+        job_id = get_job_queue().submit(path, check_type)
+    except QueueFull as e:
+        os.remove(path)
+        CHECKS.inc(endpoint="jobs", mode=_mode_label(check_type), status="rejected")
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "30"}
     except Exception as e:
+        os.remove(path)
+        CHECKS.inc(endpoint="jobs", mode=_mode_label(check_type), status="error")
         return jsonify({"error": str(e)}), 500
+    CHECKS.inc(endpoint="jobs", mode=_mode_label(check_type), status="queued")
 
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
 
-@app.route("/download_errors", methods=["POST"])
-def download_errors():
-    data = request.get_json()
-    errors = data.get("errors", [])
-    original_filename = data.get("filename", "Catalog")
 
-    df = pd.DataFrame(errors)
-    df = df.rename(columns={
-        "ID": "EEP Master Catalog Number",
-        "Title": "Title",
-        "Issue": "Issues"
-    })
-    
-    df["Status"] = ""
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job_queue().status(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
 
-    df = df[["Status", "EEP Master Catalog Number", "Title", "Issues"]]
+    body = {"job_id": job_id, "status": job["status"]}
+    if job["status"] == "failed":
+        body["error"] = job["error"]
+    elif job["status"] == "done":
+        if job["errors"]:
+            body["result"] = {"status": "issues_found", "errors": job["errors"].dicts()}
+        else:
+            body["result"] = {"status": "success", "message": f"No errors found for {job['check_mode']}!"}
+    return jsonify(body)
 
+
+def _int_arg(name, default=None, minimum=0):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number")
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return value
+
+
+@app.route("/results/<result_id>", methods=["GET"])
+def result_page(result_id):
+    """
+    A page of a stored result's errors, optionally filtered:
+      offset, limit           position in the (filtered) errors; limit <= RESULTS_PAGE_MAX
+      rule                    rule code, e.g. total_share_is_not_100_found (repeatable)
+      row_from, row_to        Excel row range, inclusive
+      file                    catalog of a batch result
+      format                  flat ({ID, Title, Issue} dicts, default) or compact
+    Returns {"result_id", "total" (matching errors), "offset", "limit", "errors" or "compact"}.
+    """
+    table = get_result_store().table(result_id)
+    if table is None:
+        return jsonify({"error": "Unknown or expired result"}), 404
+    try:
+        offset = _int_arg("offset", 0)
+        limit = min(_int_arg("limit", RESULTS_PAGE_SIZE, minimum=1), app.config['RESULTS_PAGE_MAX'])
+        row_from = _int_arg("row_from")
+        row_to = _int_arg("row_to")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    fmt = request.args.get("format", "flat")
+    if fmt not in ("flat", "compact"):
+        return jsonify({"error": "format must be flat or compact"}), 400
+
+    selected = table.select(request.args.getlist("rule"), row_from, row_to, request.args.get("file"))
+    body = {"result_id": result_id, "total": len(selected), "offset": offset, "limit": limit}
+    if fmt == "compact":
+        body["compact"] = selected.compact(offset, offset + limit)
+    else:
+        body["errors"] = selected.dicts(offset, offset + limit)
+    return jsonify(body)
+
+
+@app.route("/results/<result_id>/summary", methods=["GET"])
+def result_summary(result_id):
+    """Counts by rule of a stored result: {"result_id", "count", "rows", "rules": [{"rule", "label", "example", "count"}]}."""
+    table = get_result_store().table(result_id)
+    if table is None:
+        return jsonify({"error": "Unknown or expired result"}), 404
+    return jsonify({"result_id": result_id, **table.summary()})
+
+
+def _report_response(errors, original_filename, files=None):
     base = os.path.splitext(original_filename)[0]
     date = datetime.now().strftime("%Y-%m-%d")
     filename = f"{base} Error Checked {date}.xlsx"
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Validation Issues")
-    output.seek(0)
-
     return send_file(
-        output,
+        error_report_file(errors, files),
         as_attachment=True,
         download_name=filename,
         mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
 
+@app.route("/download_errors/<result_id>", methods=["GET"])
+def download_stored_errors(result_id):
+    """Excel report for a stored check result (result_id from /check_catalog or /check_batch)."""
+    store = get_result_store()
+    meta = store.meta(result_id)
+    errors = store.iter_errors(result_id)
+    if meta is None or errors is None:
+        return jsonify({"error": "Unknown or expired result"}), 404
+
+    return _report_response(errors, meta.get("filename") or "Catalog", meta.get("files"))
+
+
+@app.route("/download_errors", methods=["POST"])
+def download_errors():
+    data = request.get_json()
+    errors = data.get("errors", [])
+    original_filename = data.get("filename", "Catalog")
+
+    return _report_response(errors, original_filename)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text format: check counts, rows, issues, bytes and phase/rule latencies."""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
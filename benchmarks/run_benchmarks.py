@@ -0,0 +1,249 @@
+"""
+Benchmark the catalog checkers on synthetic catalogs.
+
+For each size and check mode this reports parse time (load_catalog),
+check time, serialization time (json.dumps of the flat error dicts, as
+the /check_catalog response does) and peak traced memory of each phase. Every
+engine's errors are compared with the serial engine's, and a digest of
+the errors is kept so runs on different revisions can be compared too.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --rows 1000 10000 --modes "ALL IN ONE" DROPDOWN
+    python benchmarks/run_benchmarks.py --json bench.json
+    python benchmarks/run_benchmarks.py --json new.json --baseline bench.json
+
+Engines:
+    serial    load_catalog, then checker_logic.validate_catalog_frame
+    stream    catalog_stream.iter_catalog_errors (read and checked in batches)
+    parallel  parallel_check.validate_catalog_frame_parallel on the parsed frame
+
+Generated workbooks are cached in --cache-dir, so larger sizes are only
+built once.
+"""
+import argparse
+import gc
+import hashlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from catalog_stream import iter_catalog_errors  # noqa: E402
+from checker_logic import load_catalog, validate_catalog_frame  # noqa: E402
+from parallel_check import validate_catalog_frame_parallel  # noqa: E402
+from synthetic_catalog import write_catalog_xlsx  # noqa: E402
+
+SIZES = [1000, 10000, 100000, 500000]
+MODES = ["ALL IN ONE", "METADATA", "ISWC", "RELEASE INFO", "DROPDOWN", "DUPLICATES"]
+ENGINES = ["serial", "stream", "parallel"]
+
+# a phase slower than the baseline by more than this fraction is flagged
+REGRESSION_TOLERANCE = 0.25
+
+
+# ---------- MEASUREMENT ---------- #
+
+def _timed(func, repeat):
+    """(best wall time over repeat runs, result of the last run)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _peak_memory(func):
+    """Peak bytes allocated while func runs (tracemalloc; this process only)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def errors_digest(errors):
+    h = hashlib.sha256()
+    for err in errors:
+        h.update(json.dumps(err, sort_keys=True).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+# ---------- CATALOGS ---------- #
+
+def catalog_bytes(rows, args):
+    name = f"catalog_{rows}_w{args.writers}_e{args.error_rate}_s{args.seed}.xlsx"
+    path = os.path.join(args.cache_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(args.cache_dir, exist_ok=True)
+        print(f"  generating {rows} rows -> {path}", file=sys.stderr)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        write_catalog_xlsx(tmp, rows, writers=args.writers, error_rate=args.error_rate, seed=args.seed)
+        os.replace(tmp, path)
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+# ---------- ENGINES ---------- #
+
+def run_engine(engine, data, df, mode, args):
+    """Phase timings, peak memory and errors of one engine on one catalog."""
+    if engine == "serial":
+        check = lambda: validate_catalog_frame(df, mode)
+    elif engine == "parallel":
+        check = lambda: validate_catalog_frame_parallel(df, mode, workers=args.workers, min_rows=0)
+    else:
+        # parsing is interleaved with checking, so it is all check time
+        check = lambda: list(iter_catalog_errors(io.BytesIO(data), mode, args.batch_size))
+
+    check_s, errors = _timed(check, args.repeat)
+    serialize = lambda: json.dumps(list(errors))
+    serialize_s, _ = _timed(serialize, args.repeat)
+    result = {
+        "check_s": check_s,
+        "serialize_s": serialize_s,
+        "errors": len(errors),
+        "digest": errors_digest(errors),
+    }
+    if args.memory:
+        result["check_peak_mb"] = _peak_memory(check) / 2**20
+        result["serialize_peak_mb"] = _peak_memory(serialize) / 2**20
+    return result, errors
+
+
+def first_difference(expected, actual):
+    for k, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return f"error #{k}: expected {a!r}, got {b!r}"
+    return f"expected {len(expected)} errors, got {len(actual)}"
+
+
+def run(args):
+    results = []
+    mismatches = []
+    for rows in args.rows:
+        print(f"{rows} rows", file=sys.stderr)
+        data = catalog_bytes(rows, args)
+
+        for mode in args.modes:
+            # each mode reads only the columns its rules need
+            parse = lambda: load_catalog(io.BytesIO(data), mode)
+            parse_s, df = _timed(parse, args.parse_repeat)
+            parse_peak = _peak_memory(parse) / 2**20 if args.memory else None
+
+            reference = None
+            for engine in args.engines:
+                res, errors = run_engine(engine, data, df, mode, args)
+                res.update({"rows": rows, "mode": mode, "engine": engine})
+                if engine != "stream":
+                    res["parse_s"] = parse_s
+                    res["parse_peak_mb"] = parse_peak
+                if reference is None:
+                    reference = (engine, errors)
+                elif errors != reference[1]:
+                    res["mismatch"] = first_difference(reference[1], errors)
+                    mismatches.append(f"{rows} rows, {mode}: {engine} != {reference[0]}: {res['mismatch']}")
+                results.append(res)
+                print(format_row(res), file=sys.stderr)
+    return results, mismatches
+
+
+# ---------- REPORTING ---------- #
+
+HEADER = f"{'rows':>8} {'mode':<13} {'engine':<9} {'parse s':>8} {'check s':>8} {'json s':>7} " \
+         f"{'errors':>8} {'parse MB':>9} {'check MB':>9} {'json MB':>8}"
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else format("-", spec.split(".")[0].rstrip("f"))
+
+
+def format_row(r):
+    return (
+        f"{r['rows']:>8} {r['mode']:<13} {r['engine']:<9} {_fmt(r.get('parse_s'), '>8.3f')} "
+        f"{r['check_s']:>8.3f} {r['serialize_s']:>7.3f} {r['errors']:>8} "
+        f"{_fmt(r.get('parse_peak_mb'), '>9.1f')} {_fmt(r.get('check_peak_mb'), '>9.1f')} "
+        f"{_fmt(r.get('serialize_peak_mb'), '>8.1f')}"
+        + ("  MISMATCH" if "mismatch" in r else "")
+    )
+
+
+def compare_baseline(results, baseline_path):
+    """Regressions and changed outputs against a previous --json run."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {(r["rows"], r["mode"], r["engine"]): r for r in json.load(fh)["results"]}
+
+    problems = []
+    for r in results:
+        old = baseline.get((r["rows"], r["mode"], r["engine"]))
+        if old is None:
+            continue
+        label = f"{r['rows']} rows, {r['mode']}, {r['engine']}"
+        if old["digest"] != r["digest"]:
+            problems.append(f"{label}: errors differ from baseline ({old['errors']} -> {r['errors']})")
+        for phase in ("parse_s", "check_s", "serialize_s"):
+            before, after = old.get(phase), r.get(phase)
+            if before and after and after > before * (1 + REGRESSION_TOLERANCE) and after - before > 0.05:
+                problems.append(f"{label}: {phase} {before:.3f} -> {after:.3f}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the catalog checkers on synthetic catalogs.")
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--engines", nargs="+", default=ENGINES, choices=ENGINES)
+    parser.add_argument("--repeat", type=int, default=3, help="check/serialize runs per case (best is kept)")
+    parser.add_argument("--parse-repeat", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="parallel engine processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="stream engine rows per batch")
+    parser.add_argument("--writers", type=int, default=20, help="Composer/Publisher column groups")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of rows with injected faults")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc passes")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "ebichecker_bench"))
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare with results from an earlier --json run")
+    args = parser.parse_args(argv)
+
+    results, mismatches = run(args)
+
+    print(HEADER)
+    for r in results:
+        print(format_row(r))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "cpus": os.cpu_count(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+                "results": results,
+            }, fh, indent=1)
+
+    problems = list(mismatches)
+    if args.baseline:
+        problems += compare_baseline(results, args.baseline)
+    for p in problems:
+        print(p)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
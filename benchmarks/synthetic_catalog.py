@@ -0,0 +1,190 @@
+"""
+Synthetic catalogs laid out like real EEP catalog exports.
+
+Rows are valid for every checker rule unless picked for a fault (see
+error_rate); faults are drawn from FAULTS so every rule family fires.
+Generation is deterministic for a given seed.
+"""
+import random
+
+import pandas as pd
+from openpyxl import Workbook
+
+MAX_WRITERS = 20
+
+LINKED_PUBLISHERS = {
+    "ELITE EMBASSY PUBLISHING": ("619851030", "BMI"),
+    "MUSIC EMBASSIES PUBLISHING": ("741593140", "ASCAP"),
+    "INDEPENDENT MUSIC PUBLISHING": ("512345678", "SESAC"),
+}
+
+EXCLUSION_CODES = ["NRY", "NRYI", "YTO", "UATF", "UATFOS"]
+
+FAULTS = [
+    "iswc_dots", "iswc_notes", "missing_release_date", "missing_upc", "missing_release_link",
+    "link_without_isrc", "missing_portal_link", "writer_total_blank", "writer_total_text",
+    "composer_share_blank", "bad_controlled", "bad_capacity", "missing_linked_publisher",
+    "wrong_publisher_name", "wrong_cae", "wrong_affiliation", "bad_publisher_capacity",
+    "publisher_share_mismatch", "shares_not_100", "aka_mismatch", "aka_column_missing",
+    "artist_mismatch",
+]
+
+
+def catalog_columns(writers=MAX_WRITERS, aka=5, artists=5):
+    cols = [
+        "EEP Master Catalog Number", "Title", "ISWC",
+        "Recording ISRC", "Recording Release Date (CWR)", "Recording Title",
+        "Album UPC", "Release Link", "PORTAL LINK TO SONG", "Writer Total",
+    ]
+    for i in range(1, writers + 1):
+        cols += [
+            f"Composer {i} Name", f"Composer {i} Share", f"Composer {i} Controlled",
+            f"Composer {i} Capacity", f"Composer {i} Linked Publisher",
+        ]
+        cols += [
+            f"Publisher {i} Name", f"Publisher {i} CAE No", f"Publisher {i} Affiliation",
+            f"Publisher {i} Capacity", f"Publisher {i} Share",
+        ]
+    cols.append("Alternate Title/AKA")
+    cols += [f"AKA {i}" for i in range(1, aka + 1)]
+    cols.append("Artist(s)")
+    cols += [f"Recording Display Artist {i}" for i in range(1, artists + 1)]
+    return cols
+
+
+def _shares(k, rnd):
+    if k == 1:
+        return [100]
+    cuts = sorted(rnd.sample(range(1, 100), k - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [100])]
+
+
+def iter_catalog_rows(n_rows, writers=MAX_WRITERS, aka=5, artists=5, error_rate=0.05, seed=0):
+    """Yield n_rows rows (lists aligned with catalog_columns(writers, aka, artists))."""
+    rnd = random.Random(seed)
+    columns = catalog_columns(writers, aka, artists)
+    index = {c: i for i, c in enumerate(columns)}
+
+    for n in range(n_rows):
+        row = [None] * len(columns)
+
+        def put(col, value):
+            row[index[col]] = value
+
+        put("EEP Master Catalog Number", f"EEP{n + 1:07d}")
+        put("Title", f"Song Title {n + 1}")
+
+        excluded = rnd.random() < 0.05
+        put("ISWC", rnd.choice(EXCLUSION_CODES) if excluded else f"T-{rnd.randrange(10**9):09d}-{rnd.randrange(10)}")
+
+        if rnd.random() < 0.8:
+            put("Recording ISRC", f"US{rnd.choice('ABCDEFGH')}{rnd.randrange(10**9):09d}")
+            put("Recording Release Date (CWR)", f"20{rnd.randrange(10, 26)}-0{rnd.randrange(1, 10)}-1{rnd.randrange(10)}")
+            put("Recording Title", f"Song Title {n + 1}")
+            put("Album UPC", rnd.randrange(10**11, 10**12))
+            put("Release Link", f"https://music.example.com/release/{n + 1}")
+            put("PORTAL LINK TO SONG", f"https://portal.example.com/song/{n + 1}")
+        elif rnd.random() < 0.25:
+            # recorded but not released yet: the release fields carry an exclusion code
+            put("Recording ISRC", f"US{rnd.choice('ABCDEFGH')}{rnd.randrange(10**9):09d}")
+            put("Recording Title", f"Song Title {n + 1}")
+            put("Release Link", rnd.choice(EXCLUSION_CODES))
+
+        w_count = min(rnd.choice([1, 1, 2, 2, 2, 3, 3, 4, 5, 8]), writers)
+        put("Writer Total", w_count)
+        for i, share in enumerate(_shares(w_count, rnd), 1):
+            link = rnd.choice(list(LINKED_PUBLISHERS))
+            cae, aff = LINKED_PUBLISHERS[link]
+            put(f"Composer {i} Name", f"Writer {rnd.randrange(5000)}")
+            put(f"Composer {i} Share", share)
+            put(f"Composer {i} Controlled", rnd.choice("YN"))
+            put(f"Composer {i} Capacity", rnd.choice(["A", "C", "CA"]))
+            put(f"Composer {i} Linked Publisher", link)
+            put(f"Publisher {i} Name", link)
+            put(f"Publisher {i} CAE No", int(cae))
+            put(f"Publisher {i} Affiliation", aff)
+            put(f"Publisher {i} Capacity", "OP")
+            put(f"Publisher {i} Share", share)
+
+        alt = [f"Alt Title {n + 1}-{k}" for k in range(1, rnd.randrange(0, aka + 1) + 1)]
+        if alt:
+            put("Alternate Title/AKA", "\n".join(alt))
+            for k, line in enumerate(alt, 1):
+                put(f"AKA {k}", line)
+        acts = [f"Artist {rnd.randrange(2000)}" for _ in range(rnd.randrange(1, artists + 1))]
+        put("Artist(s)", "\n".join(acts))
+        for k, line in enumerate(acts, 1):
+            put(f"Recording Display Artist {k}", line)
+
+        if rnd.random() < error_rate:
+            for fault in rnd.sample(FAULTS, rnd.choice([1, 1, 2])):
+                _apply_fault(fault, row, put, index, w_count, alt, aka, rnd)
+
+        yield row
+
+
+def _apply_fault(fault, row, put, index, w_count, alt, aka, rnd):
+    i = rnd.randrange(1, w_count + 1)
+    if fault == "iswc_dots":
+        put("ISWC", "T-123.456.789-0")
+    elif fault == "iswc_notes":
+        put("ISWC", "Notes: pending")
+    elif fault == "missing_release_date" and row[index["Recording ISRC"]]:
+        put("Recording Release Date (CWR)", None)
+    elif fault == "missing_upc" and row[index["Recording ISRC"]]:
+        put("Album UPC", None)
+    elif fault == "missing_release_link" and row[index["Recording ISRC"]]:
+        put("Release Link", None)
+    elif fault == "link_without_isrc":
+        put("Recording ISRC", None)
+        put("Release Link", "https://music.example.com/release/orphan")
+    elif fault == "missing_portal_link" and row[index["Release Link"]]:
+        put("PORTAL LINK TO SONG", None)
+    elif fault == "writer_total_blank":
+        put("Writer Total", None)
+    elif fault == "writer_total_text":
+        put("Writer Total", "two")
+    elif fault == "composer_share_blank":
+        put(f"Composer {i} Share", None)
+    elif fault == "bad_controlled":
+        put(f"Composer {i} Controlled", "Yes")
+    elif fault == "bad_capacity":
+        put(f"Composer {i} Capacity", "Author")
+    elif fault == "missing_linked_publisher":
+        put(f"Composer {i} Linked Publisher", None)
+    elif fault == "wrong_publisher_name":
+        put(f"Publisher {i} Name", "ELITE EMBASY PUBLISHING")
+    elif fault == "wrong_cae":
+        put(f"Publisher {i} CAE No", 123456789)
+    elif fault == "wrong_affiliation":
+        put(f"Publisher {i} Affiliation", "PRS")
+    elif fault == "bad_publisher_capacity":
+        put(f"Publisher {i} Capacity", "E")
+    elif fault == "publisher_share_mismatch":
+        put(f"Publisher {i} Share", 12.5)
+    elif fault == "shares_not_100":
+        put(f"Composer {i} Share", 1)
+        put(f"Publisher {i} Share", 1)
+    elif fault == "aka_mismatch" and alt:
+        put("AKA 1", "Something Else")
+    elif fault == "aka_column_missing":
+        lines = alt + [f"Extra Title {k}" for k in range(len(alt) + 1, aka + 2)]
+        put("Alternate Title/AKA", "\n".join(lines))
+    elif fault == "artist_mismatch":
+        put("Recording Display Artist 1", "Wrong Artist")
+
+
+def catalog_frame(n_rows, **kwargs):
+    """The catalog as a DataFrame (no Excel round trip)."""
+    cols = catalog_columns(kwargs.get("writers", MAX_WRITERS), kwargs.get("aka", 5), kwargs.get("artists", 5))
+    return pd.DataFrame(list(iter_catalog_rows(n_rows, **kwargs)), columns=cols)
+
+
+def write_catalog_xlsx(target, n_rows, **kwargs):
+    """Write the catalog as .xlsx to a path or binary file object, row by row."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Catalog")
+    ws.append(catalog_columns(kwargs.get("writers", MAX_WRITERS), kwargs.get("aka", 5), kwargs.get("artists", 5)))
+    for row in iter_catalog_rows(n_rows, **kwargs):
+        ws.append(row)
+    wb.save(target)
@@ -0,0 +1,200 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from rule_engine import CatalogCells
+
+HASH_CHUNK = 2**20
+
+
+def content_key(source):
+    """Cache key for an uploaded file (bytes or a seekable file): sha256 of its bytes."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    sha = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(HASH_CHUNK), b""):
+        sha.update(chunk)
+    source.seek(0)
+    return sha.hexdigest()
+
+
+class CatalogCache:
+    """
+    Parsed catalogs keyed by the hash of the uploaded bytes, so checking the
+    same file again (in any mode) skips Excel parsing.
+
+    Frames live in memory in LRU order up to max_bytes. Frames pushed out
+    of memory are spilled to spill_dir (up to max_spill_bytes, oldest files
+    dropped first) and read back on the next hit.
+
+    Spill files are pandas pickles: catalog columns routinely mix text and
+    numbers, which Arrow/Parquet would coerce, and rules must see exactly
+    the values the reader produced. The spill directory is private to this
+    process's user for that reason.
+
+    Cached frames are shared between requests and must not be modified.
+    A frame may hold more columns than the variant asked for. Each frame
+    in memory keeps its normalized CatalogCells (see cells()), counted in
+    max_bytes once refresh() has measured them.
+    """
+
+    def __init__(self, max_bytes=512 * 2**20, spill_dir=None, max_spill_bytes=2 * 2**30):
+        self.max_bytes = max_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.spill_dir = spill_dir
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir is not None:
+            os.makedirs(spill_dir, mode=0o700, exist_ok=True)
+            if hasattr(os, "getuid") and os.stat(spill_dir).st_uid != os.getuid():
+                raise PermissionError(f"Catalog cache directory {spill_dir} is owned by another user")
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.pkl")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None:
+                self._frames.move_to_end(key)
+                return entry["df"]
+
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(key)
+        try:
+            df = pd.read_pickle(path)
+            if not isinstance(df, pd.DataFrame):
+                raise TypeError(f"{path} does not hold a catalog")
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # any failure is a miss: a truncated or corrupt file raises
+            # EOFError, pickle.UnpicklingError, ValueError... It is dropped
+            # so the frame is spilled again
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.put(key, df)
+        return df
+
+    def find(self, key, variants=()):
+        """
+        The cached frame of the upload with content key key: its full parse,
+        else a parse of the first of variants (partial parses, see load())
+        that is cached. None on a miss.
+        """
+        df = self.get(key)
+        for variant in variants:
+            if df is not None:
+                break
+            df = self.get(f"{key}.{variant}")
+        return df
+
+    def load(self, source, parse=pd.read_excel, variant=None, key=None, covering=()):
+        """
+        Parsed catalog for an upload (bytes, or a seekable file parsed in
+        place), parsing only on a cache miss. key is its content_key if
+        already known. variant names a partial parse (e.g. the columns of
+        one check mode); a cached full parse serves every variant, as do
+        the covering variants (partial parses holding its columns).
+        """
+        key = key or content_key(source)
+        df = self.find(key, list(covering) + ([variant] if variant is not None else []))
+        if df is None:
+            if variant is not None:
+                key = f"{key}.{variant}"
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                source = io.BytesIO(source)
+            source.seek(0)
+            df = parse(source)
+            self.put(key, df)
+        return df
+
+    def put(self, key, df):
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if key in self._frames:
+                self._bytes -= self._frames.pop(key)["bytes"]
+            self._frames[key] = {"df": df, "frame_bytes": nbytes, "bytes": nbytes, "cells": None}
+            self._bytes += nbytes
+            evicted = self._evict()
+        self._spill_evicted(evicted)
+
+    def cells(self, df):
+        """The CatalogCells kept with a cached frame (shared by every check of it), or None if df is not cached."""
+        with self._lock:
+            for entry in self._frames.values():
+                if entry["df"] is df:
+                    if entry["cells"] is None:
+                        entry["cells"] = CatalogCells(df)
+                    return entry["cells"]
+        return None
+
+    def refresh(self, df):
+        """Count what a cached frame's cells have grown to (e.g. after a check) in max_bytes."""
+        with self._lock:
+            entry = next((e for e in self._frames.values() if e["df"] is df), None)
+            if entry is None or entry["cells"] is None:
+                return
+            cells = entry["cells"]
+        nbytes = entry["frame_bytes"] + cells.nbytes()
+        with self._lock:
+            if any(e is entry for e in self._frames.values()):
+                self._bytes += nbytes - entry["bytes"]
+                entry["bytes"] = nbytes
+            evicted = self._evict()
+        self._spill_evicted(evicted)
+
+    def _evict(self):
+        # least recently used frames out until within max_bytes; a single
+        # frame over budget is not kept in memory at all
+        evicted = []
+        while self._bytes > self.max_bytes and self._frames:
+            old_key, old = self._frames.popitem(last=False)
+            self._bytes -= old["bytes"]
+            evicted.append((old_key, old["df"]))
+        return evicted
+
+    def _spill_evicted(self, evicted):
+        # cells are not spilled: a frame read back is normalized again
+        if self.spill_dir is None:
+            return
+        for old_key, old_df in evicted:
+            if not os.path.exists(self._spill_path(old_key)):
+                self._spill(old_key, old_df)
+
+    def _spill(self, key, df):
+        path = self._spill_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+        self._trim_spill()
+
+    def _trim_spill(self):
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".pkl"):
+                st = os.stat(os.path.join(self.spill_dir, name))
+                files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.spill_dir, name))
+            except OSError:
+                pass
+            total -= size
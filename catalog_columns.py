@@ -0,0 +1,101 @@
+import functools
+
+
+# ---------- WRITER SLOT LAYOUT ---------- #
+
+MAX_WRITERS = 20
+
+# field name -> keywords that follow "COMPOSER i" / "PUBLISHER i" in the header
+WRITER_FIELDS = {
+    "c_share": ("COMPOSER", ["SHARE"]),
+    "c_ctrl": ("COMPOSER", ["CONTROLLED"]),
+    "c_cap": ("COMPOSER", ["CAPACITY"]),
+    "c_link": ("COMPOSER", ["LINKED", "PUBLISHER"]),
+    "p_name": ("PUBLISHER", ["NAME"]),
+    "p_cae": ("PUBLISHER", ["CAE"]),
+    "p_aff": ("PUBLISHER", ["AFFILIATION"]),
+    "p_cap": ("PUBLISHER", ["CAPACITY"]),
+    "p_share": ("PUBLISHER", ["SHARE"]),
+}
+
+# keyword sets covering every writer slot's columns (see ColumnPlan)
+WRITER_COLUMNS = [[role] + keywords for role, keywords in WRITER_FIELDS.values()]
+
+
+# ---------- COLUMN MAP ---------- #
+
+class ColumnMap:
+    """
+    Fuzzy header lookups for one catalog layout.
+    Every lookup is resolved once and then shared by all rows and checks.
+    """
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self._names = [str(c).upper().strip() for c in self.columns]
+        self._found = {}
+        self._writers = {}
+
+    def find(self, keywords):
+        """First column whose header contains every keyword, or None."""
+        key = tuple(k.upper() for k in keywords)
+        if key not in self._found:
+            self._found[key] = next(
+                (col for col, name in zip(self.columns, self._names)
+                 if all(k in name for k in key)),
+                None,
+            )
+        return self._found[key]
+
+    def exact(self, name):
+        """Column whose trimmed header equals name (case-insensitive), or None."""
+        key = ("=", name.upper())
+        if key not in self._found:
+            self._found[key] = next(
+                (col for col, n in zip(self.columns, self._names) if n == key[1]),
+                None,
+            )
+        return self._found[key]
+
+    def writer(self, i):
+        """Composer/Publisher columns for writer slot i, keyed as WRITER_FIELDS."""
+        if i not in self._writers:
+            self._writers[i] = {
+                field: self.find([f"{role} {i}"] + keywords)
+                for field, (role, keywords) in WRITER_FIELDS.items()
+            }
+        return self._writers[i]
+
+
+@functools.lru_cache(maxsize=64)
+def _column_map_for_header(header):
+    return ColumnMap(header)
+
+
+def column_map(df):
+    """
+    ColumnMap for a DataFrame, memoized by header signature so that
+    uploads sharing a template reuse the already resolved columns.
+    """
+    return _column_map_for_header(tuple(df.columns))
+
+
+# ---------- COLUMN PLANS ---------- #
+
+class ColumnPlan:
+    """
+    The columns a set of rules reads, as keyword sets matched the way
+    ColumnMap.find() matches (every keyword in the upper-cased header).
+    A set must match every column find() could pick for its rule (e.g.
+    ["AKA"] for "AKA {i}"), so lookups on a frame read with only these
+    columns resolve to the same columns as on the whole sheet.
+    """
+
+    def __init__(self, name, keyword_sets):
+        self.name = name
+        self.keyword_sets = [tuple(k.upper() for k in ks) for ks in keyword_sets]
+
+    def wants(self, col):
+        """usecols predicate: does the rule set read this column?"""
+        name = str(col).upper().strip()
+        return any(all(k in name for k in ks) for ks in self.keyword_sets)
@@ -0,0 +1,331 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet uploads need pyarrow
+    pq = None
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from openpyxl.utils import column_index_from_string
+# the row parser behind openpyxl's read-only worksheets; there is no public
+# hook for skipping cells, so it is extended here (iter_sheet_rows falls
+# back to the public reader if it moves)
+try:
+    from openpyxl.worksheet._reader import WorkSheetParser
+except ImportError:
+    WorkSheetParser = object
+from pandas.io.parsers import TextParser
+
+_DIGITS = "0123456789"
+_column_numbers = {}
+# cell texts pd.read_excel reads as missing (its default na_values)
+NA_TEXTS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+
+def _column(ref):
+    """Column number of a cell reference like 'AB12'."""
+    letters = ref.rstrip(_DIGITS)
+    number = _column_numbers.get(letters)
+    if number is None:
+        number = _column_numbers[letters] = column_index_from_string(letters)
+    return number
+
+
+def _convert_cell(cell):
+    """Parsed cell value as pd.read_excel sees it (openpyxl engine)."""
+    value = cell["value"]
+    if value is None:
+        return ""
+    if cell["data_type"] == TYPE_ERROR:
+        return np.nan
+    if cell["data_type"] == TYPE_NUMERIC:
+        val = int(value)
+        if val == value:
+            return val
+        return float(value)
+    return value
+
+
+class _RowParser(WorkSheetParser):
+    """
+    openpyxl's worksheet parser, decoding only the cells of `wanted`
+    columns (all when None). Other cells are decoded only until the row
+    shows a value, to tell blank rows from the rest like read_excel does.
+    Rows come out as (row number, ({column: value}, has_data)).
+    """
+
+    wanted = None
+    last_wanted = None
+
+    def parse_row(self, row):
+        ref = row.get("r")
+        if ref is None:
+            self.row_counter += 1
+        else:
+            number = float(ref)
+            if not number.is_integer():
+                raise ValueError(f"{ref} is not a valid row number")
+            self.row_counter = int(number)
+
+        values = {}
+        has_data = False
+        col = 0
+        for el in row:
+            ref = el.get("r")
+            col = _column(ref) if ref else col + 1
+            if has_data and self.last_wanted is not None and col > self.last_wanted:
+                # cells come in column order: nothing left to decode
+                break
+            if self.wanted is None or col in self.wanted:
+                # parse_cell numbers cells without a reference from col_counter
+                self.col_counter = col - 1
+                value = _convert_cell(self.parse_cell(el))
+                if not (isinstance(value, str) and value == ""):
+                    values[col] = value
+                    has_data = True
+            elif not has_data:
+                self.col_counter = col - 1
+                value = _convert_cell(self.parse_cell(el))
+                has_data = not (isinstance(value, str) and value == "")
+        return self.row_counter, (values, has_data)
+
+
+def _header_names(header):
+    """Column names pd.read_excel gives this header row ('Unnamed: 3', 'AKA 1.1', ...)."""
+    return list(TextParser([header], header=0, skip_blank_lines=False).read().columns)
+
+
+def iter_sheet_rows(file_buffer, usecols=None):
+    """
+    Read the first sheet the way pd.read_excel(file_buffer, usecols=usecols)
+    does, but without decoding cells of columns usecols rejects. Yields the
+    selected column names, then each data row as a list of their values
+    (NaN for blank cells and read_excel's NA texts). Blank rows are kept
+    unless nothing follows them.
+
+    The first column is always selected so the row count survives a
+    usecols that matches nothing. Cells right of the last header cell
+    are ignored.
+    """
+    book = load_workbook(file_buffer, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = book.worksheets[0]
+        try:
+            source = sheet._get_source()
+            parser = _RowParser(
+                source,
+                book.shared_strings,
+                data_only=True,
+                epoch=book.epoch,
+                date_formats=book._date_formats,
+                timedelta_formats=book._timedelta_formats,
+            )
+        except Exception:
+            # openpyxl's internals changed: its public (slower, every cell
+            # decoded) reader gives the same rows
+            yield from _select_rows(_public_rows(sheet), None, usecols)
+            return
+        with source:
+            yield from _select_rows(_numbered_rows(parser.parse()), parser, usecols)
+    finally:
+        book.close()
+
+
+def _public_rows(sheet):
+    # rows as _numbered_rows gives them, from openpyxl's read-only cells
+    sheet.reset_dimensions()
+    for cells in sheet.iter_rows():
+        values = {}
+        for col, cell in enumerate(cells, 1):
+            value = _convert_cell({"value": cell.value, "data_type": cell.data_type})
+            if not (isinstance(value, str) and value == ""):
+                values[col] = value
+        yield values, bool(values)
+
+
+def _numbered_rows(parsed):
+    # rows missing from the sheet xml are blank rows, as in openpyxl's read-only mode
+    blank = ({}, False)
+    counter = 1
+    for idx, row in parsed:
+        while counter < idx:
+            counter += 1
+            yield blank
+        if counter <= idx:
+            counter += 1
+            yield row
+
+
+def _select_rows(rows, parser, usecols):
+    first = next(rows, None)
+    if first is None:
+        return
+
+    values = first[0]
+    header = [values.get(c, "") for c in range(1, max(values, default=0) + 1)]
+    width = max(len(header), 1)
+    names = _header_names(header + [""] * (width - len(header)))
+
+    keep = [k for k in range(width) if k == 0 or usecols is None or usecols(names[k])]
+    position = {k + 1: pos for pos, k in enumerate(keep)}
+    if parser is not None:
+        parser.wanted = set(position)
+        parser.last_wanted = max(position)
+    yield [names[k] for k in keep]
+
+    blank_run = 0
+    for values, has_data in rows:
+        if not has_data:
+            # read_excel keeps blank rows unless nothing follows them
+            blank_run += 1
+            continue
+        for _ in range(blank_run):
+            yield [np.nan] * len(keep)
+        blank_run = 0
+        row = [np.nan] * len(keep)
+        for col, value in values.items():
+            pos = position.get(col)
+            if pos is not None:
+                row[pos] = np.nan if value.__class__ is str and value in NA_TEXTS else value
+        yield row
+
+
+def rows_to_frame(names, rows, start=0):
+    """
+    DataFrame of rows from iter_sheet_rows; index from start. Columns are
+    object dtype and hold each cell's own value: nothing is inferred per
+    column (read_excel would turn 1 into 1.0 next to a blank, or into True
+    next to a bool), so a cell reads the same in the whole sheet and in
+    any batch of it.
+    """
+    return pd.DataFrame(rows, columns=names, index=pd.RangeIndex(start, start + len(rows)), dtype=object)
+
+
+# ---------- OTHER FORMATS ---------- #
+
+# leading bytes of the binary formats an upload may be in
+MAGIC = [
+    (b"PK\x03\x04", "xlsx"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "xls"),
+    (b"PAR1", "parquet"),
+]
+CSV_DELIMITERS = ",;\t|"
+SNIFF_BYTES = 64 * 1024
+
+
+def _csv_dialect(head):
+    """(delimiter, encoding) if head looks like the start of a CSV file, else None."""
+    if b"\x00" in head:
+        return None
+    if head.startswith(b"\xef\xbb\xbf"):
+        encoding = "utf-8-sig"
+    else:
+        try:
+            # the sample may end inside a multi-byte character
+            head[:-4].decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+    first_line = head.split(b"\n", 1)[0].decode(encoding, errors="replace")
+    counts = {d: first_line.count(d) for d in CSV_DELIMITERS}
+    delimiter = max(counts, key=counts.get)
+    if not counts[delimiter]:
+        return None
+    return delimiter, encoding
+
+
+def detect_format(file_buffer):
+    """
+    "xlsx", "xls", "parquet" or "csv" from the first bytes of the upload,
+    None if unknown. The buffer is rewound afterwards.
+    """
+    head = file_buffer.read(SNIFF_BYTES)
+    file_buffer.seek(0)
+    for magic, fmt in MAGIC:
+        if head.startswith(magic):
+            return fmt
+    if _csv_dialect(head):
+        return "csv"
+    return None
+
+
+def _with_first_column(usecols, first):
+    if usecols is None:
+        return None
+    return lambda name: name == first or usecols(name)
+
+
+def read_csv_catalog(file_buffer, usecols=None):
+    """
+    A CSV catalog, typed and named like pd.read_excel would read the same
+    sheet: blank lines are blank rows unless nothing follows them, and the
+    first column is always kept.
+
+    Trailing rows are trimmed on the selected columns only, so a last row
+    with values only in columns usecols rejects is dropped.
+    """
+    head = file_buffer.read(SNIFF_BYTES)
+    file_buffer.seek(0)
+    delimiter, encoding = _csv_dialect(head) or (",", "utf-8")
+    # pandas' C parser, not engine="pyarrow": that engine fails on large files
+    # with quoted cells spanning lines (AKA lists) and reads ISO dates as
+    # datetime.date objects, which the rules do not expect
+    options = {"sep": delimiter, "encoding": encoding, "skip_blank_lines": False}
+    first = pd.read_csv(file_buffer, nrows=0, **options).columns[0]
+    file_buffer.seek(0)
+
+    df = pd.read_csv(file_buffer, usecols=_with_first_column(usecols, first), low_memory=False, **options)
+    filled = df.notna().any(axis=1).to_numpy()
+    if len(df) and not filled[-1]:
+        last = np.flatnonzero(filled)
+        df = df.iloc[:last[-1] + 1 if len(last) else 0]
+    return df
+
+
+def read_parquet_catalog(file_buffer, usecols=None):
+    """A Parquet catalog; only the columns usecols keeps (and the first) are read."""
+    if pq is None:
+        raise ValueError("Reading Parquet catalogs requires pyarrow")
+    source = pq.ParquetFile(file_buffer)
+    names = source.schema_arrow.names
+    if usecols is not None:
+        names = [n for k, n in enumerate(names) if k == 0 or usecols(n)]
+    table = source.read(columns=names, use_pandas_metadata=False)
+    return table.to_pandas().reset_index(drop=True)
+
+
+def _read_xlsx(file_buffer, usecols=None):
+    try:
+        rows = iter_sheet_rows(file_buffer, usecols)
+        names = next(rows, None)
+    except Exception:
+        # not a workbook openpyxl reads: pandas picks the engine (or raises)
+        file_buffer.seek(0)
+        return pd.read_excel(file_buffer, usecols=usecols, dtype=object)
+    if names is None:
+        return pd.DataFrame()
+    return rows_to_frame(names, list(rows))
+
+
+READERS = {
+    "xlsx": _read_xlsx,
+    "csv": read_csv_catalog,
+    "parquet": read_parquet_catalog,
+}
+
+
+def read_catalog(file_buffer, usecols=None):
+    """
+    The catalog in an upload of any supported format, with the rows and
+    columns pd.read_excel would read (only those usecols keeps). The format comes
+    from the first bytes (detect_format); .xls and unknown files go to
+    pd.read_excel, which reads them or raises.
+    """
+    reader = READERS.get(detect_format(file_buffer))
+    if reader is None:
+        return pd.read_excel(file_buffer, usecols=usecols, dtype=object)
+    return reader(file_buffer, usecols)
@@ -0,0 +1,118 @@
+import itertools
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from catalog_reader import detect_format, iter_sheet_rows, read_catalog, rows_to_frame
+from checker_logic import column_plan, validate_catalog_frame
+from checker_logic_old import unreadable_file_errors
+from rule_engine import DuplicateIndex, merge_by_row
+
+BATCH_ROWS = 5000
+
+
+# ---------- ROW READER ---------- #
+
+def estimate_rows(file_buffer):
+    """
+    Data row count from the sheet's stored dimensions, without reading rows.
+    Only an estimate (writers may record stale dimensions); None if unknown.
+    The buffer is rewound afterwards.
+    """
+    try:
+        book = load_workbook(file_buffer, read_only=True, data_only=True, keep_links=False)
+        try:
+            max_row = book.worksheets[0].max_row
+        finally:
+            book.close()
+    except Exception:
+        max_row = None
+    file_buffer.seek(0)
+    return max(max_row - 1, 0) if max_row else None
+
+
+def iter_catalog_batches(file_buffer, batch_size=BATCH_ROWS, usecols=None):
+    """
+    Read the first sheet lazily and yield it as DataFrames of at most
+    batch_size rows. Headers, blank rows and the index (row number - 2)
+    follow pd.read_excel, so rules see the same rows; usecols limits the
+    columns read, as in pd.read_excel.
+
+    Cells hold the same values as in read_catalog (see rows_to_frame).
+    Cells to the right of the last header cell are ignored.
+
+    CSV and Parquet catalogs are read whole (their readers are fast) and
+    then cut into batches.
+    """
+    if detect_format(file_buffer) in ("csv", "parquet"):
+        yield from iter_frame_batches(read_catalog(file_buffer, usecols), batch_size)
+        return
+
+    rows = iter_sheet_rows(file_buffer, usecols)
+    names = next(rows, None)
+    if names is None:
+        return
+
+    start = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield rows_to_frame(names, batch, start)
+            start += len(batch)
+            batch = []
+    if batch:
+        yield rows_to_frame(names, batch, start)
+
+
+def iter_frame_batches(df, batch_size=BATCH_ROWS):
+    """A catalog already read, as iter_catalog_batches would yield it."""
+    for start in range(0, len(df), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+# ---------- STREAMING VALIDATION ---------- #
+
+def iter_error_batches(source, check_mode="ALL IN ONE", batch_size=BATCH_ROWS, extra_errors=None, keep=None):
+    """
+    Validate a catalog batch by batch. source is the upload (a file), or
+    the catalog already read (a DataFrame, e.g. from the CatalogCache).
+    Yields (rows checked so far, errors found in this batch).
+
+    Duplicates are tracked across batches, so a repeat is reported in the
+    batch of its later row. extra_errors(batch) may add errors of other
+    checks (e.g. identifier history), merged in row order. Each batch
+    is appended to the list keep, if given (e.g. to cache the catalog).
+    """
+    if isinstance(source, pd.DataFrame):
+        batches = iter_frame_batches(source, batch_size)
+    else:
+        # only the columns the mode's rules read
+        batches = iter_catalog_batches(source, batch_size, column_plan(check_mode).wants)
+    if check_mode == "ALL IN ONE":
+        # the all-in-one checker reports unreadable files as an issue
+        try:
+            first = next(batches, None)
+        except Exception as e:
+            yield 0, unreadable_file_errors(e)
+            return
+        if first is None:
+            return
+        batches = itertools.chain([first], batches)
+
+    seen = DuplicateIndex()
+    rows_checked = 0
+    for df in batches:
+        if keep is not None:
+            keep.append(df)
+        rows_checked += len(df)
+        errors = validate_catalog_frame(df, check_mode, seen=seen)
+        if extra_errors is not None:
+            errors = merge_by_row(errors, extra_errors(df))
+        yield rows_checked, errors
+
+
+def iter_catalog_errors(file_buffer, check_mode="ALL IN ONE", batch_size=BATCH_ROWS):
+    """Error dicts in row order, produced while the workbook is still being read."""
+    for _, errors in iter_error_batches(file_buffer, check_mode, batch_size):
+        yield from errors
@@ -1,15 +1,36 @@
-import pandas as pd
+import functools
+
+import numpy as np
+
+from catalog_columns import WRITER_COLUMNS, ColumnPlan, column_map
+from catalog_reader import read_catalog
+from error_table import ErrorTable
+from metrics import timed, timed_rule
+from rule_engine import (
+    CatalogCells,
+    DuplicateIndex,
+    RuleHits,
+    add_duplicate_hits,
+    format_errors,
+    publisher_expectations,
+    share_totals,
+    writer_counts,
+    writer_table,
+)
 
 # IMPORT OLD ALL-IN-ONE CHECKER (AUTHORITATIVE LOGIC)
 from checker_logic_old import validate_catalog_file as old_all_in_one_checker
+from checker_logic_old import validate_catalog_frame as old_all_in_one_frame
+from checker_logic_old import duplicate_errors as old_all_in_one_duplicates
+from checker_logic_old import _is_excluded
 
 
 # ---------- COMMON HELPERS ---------- #
 
-def _norm_str(v):
-    if pd.isna(v) or v is None:
-        return ""
-    return str(v).strip()
+PUBLISHER_RULES = {
+    # Linked Publisher -> (Publisher Name, CAE No, Affiliation)
+    "ELITE EMBASSY PUBLISHING": ("ELITE EMBASSY PUBLISHING", "619851030", "BMI"),
+}
 
 
 def _parse_float(v):
@@ -20,220 +41,224 @@ def _parse_float(v):
         return 0.0
 
 
-def _is_empty(v):
-    return _norm_str(v) == ""
+# ---------- MODULAR CHECKS ---------- #
+# Each check adds failing rows to `hits` column by column, in the order
+# the messages appear for a single row. Checks take the same arguments so
+# they can be run from RULES.
 
+def check_alternate_titles(cells, hits, cmap, cols):
+    """Validates Alternate Title lines against AKA {i}"""
+    col_alt_source = cmap.find(["ALTERNATE", "TITLE"])
+    if col_alt_source:
+        pos, line_no, line_text = cells.lines(col_alt_source)
+        for i in np.unique(line_no).tolist():
+            sel = line_no == i
+            # Search specifically for "AKA" and the index number
+            col_aka = cmap.find(["AKA", str(i)])
+            if col_aka:
+                bad = cells.upper(col_aka)[pos[sel]] != line_text[sel]
+                hits.add_rows(pos[sel][bad], "Alternate Title line {i} does not match {d}", index=i, detail=col_aka)
+            else:
+                hits.add_rows(pos[sel], "Column 'AKA {i}' not found to match Alternate Title line {i}", index=i)
+
+
+def check_display_artists(cells, hits, cmap, cols):
+    """Validates Artist(s) lines against Recording Display Artist {i}"""
+    col_art_source = cmap.find(["ARTIST(S)"])
+    if col_art_source:
+        pos, line_no, line_text = cells.lines(col_art_source)
+        for i in np.unique(line_no).tolist():
+            sel = line_no == i
+            col_art_target = cmap.find(["RECORDING", "DISPLAY", "ARTIST", str(i)])
+            if col_art_target:
+                bad = cells.upper(col_art_target)[pos[sel]] != line_text[sel]
+                hits.add_rows(pos[sel][bad], "Artist line {i} does not match {d}", index=i, detail=col_art_target)
+            else:
+                hits.add_rows(pos[sel], "Column 'Recording Display Artist {i}' not found to match Artist line {i}", index=i)
 
-def _find_col(df, keywords):
-    for col in df.columns:
-        name = str(col).upper()
-        if all(k.upper() in name for k in keywords):
-            return col
-    return None
 
+def check_iswc_only(cells, hits, cmap, cols):
+    if cols["iswc"]:
+        hits.add(cells.test(cols["iswc"], lambda v: "." in v or "NOTES" in v.upper()), "ISWC has dots or Notes")
 
-# ---------- MODULAR CHECKS ---------- #
 
-def check_multiline_metadata(row, row_num, df):
-    """
-    Validates Alternate Title lines against AKA {i} 
-    and Artist(s) lines against Recording Display Artist {i}
-    """
-    errs = []
+def check_release_info_only(cells, hits, cmap, cols):
+    has_isrc = ~cells.empty(cols["isrc"])
+    has_rel_link = ~cells.empty(cols["rel_link"])
 
-    # 1. Validation for Alternate Title -> AKA 1, AKA 2...
-    col_alt_source = _find_col(df, ["ALTERNATE", "TITLE"])
-    if col_alt_source:
-        raw_val = _norm_str(row.get(col_alt_source))
-        if raw_val:
-            # Split by newline and remove empty lines
-            lines = [line.strip() for line in raw_val.split('\n') if line.strip()]
-            for i, line_text in enumerate(lines, 1):
-                # Search specifically for "AKA" and the index number
-                col_aka = _find_col(df, ["AKA", str(i)])
-                if col_aka:
-                    aka_val = _norm_str(row.get(col_aka))
-                    if aka_val.upper() != line_text.upper():
-                        errs.append(f"Row {row_num}: Alternate Title line {i} does not match {col_aka}")
-                else:
-                    errs.append(f"Row {row_num}: Column 'AKA {i}' not found to match Alternate Title line {i}")
-
-    # 2. Validation for Artist(s) -> Recording Display Artist 1, 2...
-    col_art_source = _find_col(df, ["ARTIST(S)"])
-    if col_art_source:
-        raw_val = _norm_str(row.get(col_art_source))
-        if raw_val:
-            lines = [line.strip() for line in raw_val.split('\n') if line.strip()]
-            for i, line_text in enumerate(lines, 1):
-                col_art_target = _find_col(df, ["RECORDING", "DISPLAY", "ARTIST", str(i)])
-                if col_art_target:
-                    target_val = _norm_str(row.get(col_art_target))
-                    if target_val.upper() != line_text.upper():
-                        errs.append(f"Row {row_num}: Artist line {i} does not match {col_art_target}")
-                else:
-                    errs.append(f"Row {row_num}: Column 'Recording Display Artist {i}' not found to match Artist line {i}")
+    hits.add(has_isrc & cells.empty(cols["rel_date"]), "Recording Release Date (CWR) is missing or not matched")
+    hits.add(has_isrc & cells.empty(cols["rec_title"]), "Recording Title is missing or not matched")
+    hits.add(has_isrc & cells.empty(cols["upc"]), "Album UPC is missing or not matched")
+    hits.add(has_isrc & ~has_rel_link, "Release Link is missing or not matched")
 
-    return errs
+    hits.add(has_rel_link & ~has_isrc, "Recording ISRC is missing or not matched (Required for Release Link)")
 
+    hits.add(has_rel_link & cells.empty(cols["portal_link"]), "PORTAL LINK TO SONG is missing or not matched")
 
-def check_iswc_only(row, row_num, col_iswc):
-    errs = []
-    val = _norm_str(row.get(col_iswc))
-    if "." in val or "NOTES" in val.upper():
-        errs.append(f"Row {row_num}: ISWC has dots or Notes")
-    return errs
 
+def check_dropdown_only(cells, hits, cmap, cols):
+    col_writer_total = cmap.find(["WRITER", "TOTAL"])
+    wt_empty = cells.empty(col_writer_total)
+    hits.add(wt_empty, "Writer Total is missing or not matched")
 
-def check_release_info_only(row, row_num, cols):
-    errs = []
+    w_count, valid = writer_counts(cells.raw(col_writer_total), wt_empty)
+    hits.add(~wt_empty & ~valid, "Writer Total is not a valid number")
 
-    isrc = _norm_str(row.get(cols["isrc"]))
-    rel_link = _norm_str(row.get(cols["rel_link"]))
+    # one row per (catalog row, writer slot); invalid Writer Totals count as 0
+    wt = writer_table(cells, cmap, w_count, _parse_float)
 
-    if isrc:
-        if _is_empty(row.get(cols["rel_date"])):
-            errs.append(f"Row {row_num}: Recording Release Date (CWR) is missing or not matched")
-        if _is_empty(row.get(cols["rec_title"])):
-            errs.append(f"Row {row_num}: Recording Title is missing or not matched")
-        if _is_empty(row.get(cols["upc"])):
-            errs.append(f"Row {row_num}: Album UPC is missing or not matched")
-        if _is_empty(rel_link):
-            errs.append(f"Row {row_num}: Release Link is missing or not matched")
+    with hits.per_slot():
+        hits.add_slots(wt, wt["c_share_empty"], "Composer {i} Share is missing or not matched")
 
-    if rel_link and not isrc:
-        errs.append(f"Row {row_num}: Recording ISRC is missing or not matched (Required for Release Link)")
+        hits.add_slots(wt, ~wt["c_ctrl"].isin(["Y", "N"]), "Composer {i} Controlled is missing or not matched")
 
-    if rel_link and _is_empty(row.get(cols["portal_link"])):
-        errs.append(f"Row {row_num}: PORTAL LINK TO SONG is missing or not matched")
+        hits.add_slots(wt, ~wt["c_cap"].isin(["A", "C", "AC", "CA"]), "Composer {i} Capacity is missing or not matched")
 
-    return errs
+        hits.add_slots(wt, wt["c_link"] == "", "Composer {i} Linked Publisher is missing or not matched")
 
+        _, name_bad, cae_bad, aff_bad = publisher_expectations(wt, PUBLISHER_RULES)
+        hits.add_slots(wt, name_bad, "Publisher {i} Name is missing or not matched")
+        hits.add_slots(wt, cae_bad, "Publisher {i} CAE No is missing or not matched")
+        hits.add_slots(wt, aff_bad, "Publisher {i} Affiliation is missing or not matched")
 
-def check_dropdown_only(row, row_num, df):
-    errs = []
+        hits.add_slots(wt, wt["p_cap"] != "OP", "Publisher {i} Capacity is missing or not matched (Should be OP)")
 
-    col_writer_total = _find_col(df, ["WRITER", "TOTAL"])
-    wt_raw = row.get(col_writer_total)
+        share_val = np.where(wt["c_share_empty"], 0.0, wt["c_share"])
+        with np.errstate(invalid="ignore"):
+            share_off = np.abs(wt["p_share"].to_numpy() - share_val) > 0.01
+        hits.add_slots(wt, wt["p_share_empty"] | share_off, "Publisher {i} Share does not match Composer {i} Share")
 
-    if _is_empty(wt_raw):
-        errs.append(f"Row {row_num}: Writer Total is missing or not matched")
-        return errs
+    total_share = share_totals(wt, cells.n)
+    with np.errstate(invalid="ignore"):
+        hits.add(valid & (np.abs(total_share - 100.0) > 0.1), "Total Share is not 100%")
 
-    try:
-        w_count = int(float(wt_raw))
-    except:
-        errs.append(f"Row {row_num}: Writer Total is not a valid number")
-        return errs
 
-    loop_limit = min(w_count, 20)
-    total_share = 0.0
+def check_duplicate_identifiers(cells, hits, cmap, cols):
+    """The same ISWC or ISRC on two rows of the catalog (exclusion codes skipped)."""
+    add_duplicate_hits(cells, hits, cols["iswc"], "ISWC", cols["seen"], skip=_is_excluded)
+    add_duplicate_hits(cells, hits, cols["isrc"], "ISRC", cols["seen"], skip=_is_excluded)
 
-    for i in range(1, loop_limit + 1):
-        c_share_col = _find_col(df, [f"COMPOSER {i}", "SHARE"])
-        c_ctrl_col = _find_col(df, [f"COMPOSER {i}", "CONTROLLED"])
-        c_cap_col = _find_col(df, [f"COMPOSER {i}", "CAPACITY"])
-        c_link_col = _find_col(df, [f"COMPOSER {i}", "LINKED", "PUBLISHER"])
 
-        p_name_col = _find_col(df, [f"PUBLISHER {i}", "NAME"])
-        p_cae_col = _find_col(df, [f"PUBLISHER {i}", "CAE"])
-        p_aff_col = _find_col(df, [f"PUBLISHER {i}", "AFFILIATION"])
-        p_cap_col = _find_col(df, [f"PUBLISHER {i}", "CAPACITY"])
-        p_share_col = _find_col(df, [f"PUBLISHER {i}", "SHARE"])
+# ---------- RULE REGISTRY ---------- #
+# Rule families with the columns they read, as ColumnPlan keyword sets.
+# A check mode runs its families in order and reads only their columns
+# (plus ID_COLUMNS for the report).
 
-        raw_share = row.get(c_share_col)
-        if _is_empty(raw_share):
-            errs.append(f"Row {row_num}: Composer {i} Share is missing or not matched")
-            share_val = 0.0
-        else:
-            share_val = _parse_float(raw_share)
+ID_COLUMNS = [["EEP", "CATALOG"], ["TITLE"]]
 
-        total_share += share_val
+RULES = {
+    "iswc": (check_iswc_only, [["ISWC"]]),
+    "release_info": (check_release_info_only, [
+        ["RECORDING", "ISRC"], ["RELEASE", "DATE", "CWR"], ["RECORDING", "TITLE"],
+        ["ALBUM", "UPC"], ["RELEASE LINK"], ["PORTAL", "LINK"],
+    ]),
+    "writers": (check_dropdown_only, [["WRITER", "TOTAL"]] + WRITER_COLUMNS),
+    "aka": (check_alternate_titles, [["ALTERNATE", "TITLE"], ["AKA"]]),
+    "artists": (check_display_artists, [["ARTIST(S)"], ["RECORDING", "DISPLAY", "ARTIST"]]),
+    # Album UPC is not checked within a catalog (tracks share it), but is
+    # read for the identifier history
+    "duplicates": (check_duplicate_identifiers, [["ISWC"], ["RECORDING", "ISRC"], ["ALBUM", "UPC"]]),
+}
 
-        if _norm_str(row.get(c_ctrl_col)).upper() not in ["Y", "N"]:
-            errs.append(f"Row {row_num}: Composer {i} Controlled is missing or not matched")
+# Families comparing rows with each other: a chunk of a catalog cannot run
+# them on its own (see duplicate_errors)
+CROSS_ROW_RULES = {"duplicates"}
 
-        if _norm_str(row.get(c_cap_col)).upper() not in ["A", "C", "AC", "CA"]:
-            errs.append(f"Row {row_num}: Composer {i} Capacity is missing or not matched")
+MODE_RULES = {
+    # ALL IN ONE runs checker_logic_old, which covers every family
+    "ALL IN ONE": list(RULES),
+    "ISWC": ["iswc"],
+    "RELEASE INFO": ["release_info"],
+    "DROPDOWN": ["writers"],
+    "METADATA": ["aka", "artists"],
+    "DUPLICATES": ["duplicates"],
+}
 
-        link_val = _norm_str(row.get(c_link_col))
-        if not link_val:
-            errs.append(f"Row {row_num}: Composer {i} Linked Publisher is missing or not matched")
 
-        pub_name = _norm_str(row.get(p_name_col)).upper()
-        pub_cae = _norm_str(row.get(p_cae_col)).replace(".0", "")
-        pub_aff = _norm_str(row.get(p_aff_col)).upper()
+@functools.lru_cache(maxsize=32)
+def column_plan(check_mode):
+    """ColumnPlan of the columns check_mode reads."""
+    families = MODE_RULES.get(check_mode, [])
+    keyword_sets = list(ID_COLUMNS)
+    for name in families:
+        keyword_sets += RULES[name][1]
+    return ColumnPlan("+".join(families) or "ids", keyword_sets)
 
-        if link_val.upper() == "ELITE EMBASSY PUBLISHING":
-            if pub_name != "ELITE EMBASSY PUBLISHING":
-                errs.append(f"Row {row_num}: Publisher {i} Name is missing or not matched")
-            if pub_cae != "619851030":
-                errs.append(f"Row {row_num}: Publisher {i} CAE No is missing or not matched")
-            if pub_aff != "BMI":
-                errs.append(f"Row {row_num}: Publisher {i} Affiliation is missing or not matched")
 
-        if _norm_str(row.get(p_cap_col)).upper() != "OP":
-            errs.append(f"Row {row_num}: Publisher {i} Capacity is missing or not matched (Should be OP)")
+def load_catalog(file_buffer, check_mode="ALL IN ONE"):
+    """
+    The catalog (Excel, CSV or Parquet) as check_mode needs it: the whole
+    sheet for ALL IN ONE, otherwise only the columns in the mode's column plan.
+    """
+    with timed("parse"):
+        if check_mode == "ALL IN ONE":
+            return read_catalog(file_buffer)
+        return read_catalog(file_buffer, column_plan(check_mode).wants)
 
-        pub_share = _parse_float(row.get(p_share_col))
-        if _is_empty(row.get(p_share_col)) or abs(pub_share - share_val) > 0.01:
-            errs.append(f"Row {row_num}: Publisher {i} Share does not match Composer {i} Share")
 
-    if abs(total_share - 100.0) > 0.1:
-        errs.append(f"Row {row_num}: Total Share is not 100%")
+# ---------- MAIN ENTRY POINT ---------- #
 
-    return errs
+def validate_catalog_frame(df, check_mode="ALL IN ONE", cross_row=True, seen=None):
+    """
+    Errors of check_mode's rules on a catalog frame. cross_row=False leaves
+    out the CROSS_ROW_RULES (df is a chunk of a catalog); seen carries the
+    DuplicateIndex of earlier batches when a catalog is read in batches.
+    """
+    if check_mode == "ALL IN ONE":
+        return old_all_in_one_frame(df, cross_row, seen)
 
+    families = [name for name in MODE_RULES.get(check_mode, []) if cross_row or name not in CROSS_ROW_RULES]
+    return _run_rules(df, check_mode, families, seen)
+
+
+def duplicate_errors(df, check_mode="ALL IN ONE", seen=None):
+    """Only the cross-row errors of check_mode, for callers checking rows in chunks."""
+    if check_mode == "ALL IN ONE":
+        return old_all_in_one_duplicates(df, seen)
+
+    families = [name for name in MODE_RULES.get(check_mode, []) if name in CROSS_ROW_RULES]
+    if not families:
+        return ErrorTable.empty()
+    return _run_rules(df, check_mode, families, seen)
+
+
+def _run_rules(df, check_mode, families, seen=None):
+    with timed("columns"):
+        cmap = column_map(df)
+        cells = CatalogCells.of(df)
+
+        cols = {
+            "catalog": cmap.find(["EEP", "CATALOG"]),
+            "title": cmap.find(["TITLE"]),
+            "iswc": cmap.find(["ISWC"]),
+            "isrc": cmap.find(["RECORDING", "ISRC"]),
+            "rel_date": cmap.find(["RELEASE", "DATE", "CWR"]),
+            "rec_title": cmap.find(["RECORDING", "TITLE"]),
+            "upc": cmap.find(["ALBUM", "UPC"]),
+            "rel_link": cmap.exact("RELEASE LINK"),
+            "portal_link": cmap.find(["PORTAL", "LINK"]),
+            "seen": seen if seen is not None else DuplicateIndex(),
+        }
+
+    hits = RuleHits(cells.n)
+
+    for name in families:
+        check, _ = RULES[name]
+        with timed_rule(check_mode, name):
+            check(cells, hits, cmap, cols)
+
+    with timed("format"):
+        cid = np.where(cells.empty(cols["catalog"]), "Unknown ID", cells.text(cols["catalog"]))
+        title = np.where(cells.empty(cols["title"]), "Unknown Title", cells.text(cols["title"]))
+        return format_errors(df, hits, cid, title)
 
-# ---------- MAIN ENTRY POINT ---------- #
 
 def validate_catalog_file(file_buffer, check_mode="ALL IN ONE"):
 
     if check_mode == "ALL IN ONE":
-        # Note: You might want to update the old checker too if you want 
+        # Note: You might want to update the old checker too if you want
         # these new rules to appear in 'ALL IN ONE' mode.
         return old_all_in_one_checker(file_buffer)
 
-    df = pd.read_excel(file_buffer)
-
-    cols = {
-        "catalog": _find_col(df, ["EEP", "CATALOG"]),
-        "title": _find_col(df, ["TITLE"]),
-        "iswc": _find_col(df, ["ISWC"]),
-        "isrc": _find_col(df, ["RECORDING", "ISRC"]),
-        "rel_date": _find_col(df, ["RELEASE", "DATE", "CWR"]),
-        "rec_title": _find_col(df, ["RECORDING", "TITLE"]),
-        "upc": _find_col(df, ["ALBUM", "UPC"]),
-        "rel_link": next((c for c in df.columns if str(c).upper().strip() == "RELEASE LINK"), None),
-        "portal_link": _find_col(df, ["PORTAL", "LINK"]),
-    }
-
-    errors = []
-
-    for idx, row in df.iterrows():
-        row_num = idx + 2
-        cid = _norm_str(row.get(cols["catalog"])) or "Unknown ID"
-        title = _norm_str(row.get(cols["title"])) or "Unknown Title"
-
-        issues = []
-
-        if check_mode == "ISWC" and cols["iswc"]:
-            issues += check_iswc_only(row, row_num, cols["iswc"])
-
-        if check_mode == "RELEASE INFO":
-            issues += check_release_info_only(row, row_num, cols)
-
-        if check_mode == "DROPDOWN":
-            issues += check_dropdown_only(row, row_num, df)
-            
-        # ADDED: New metadata mode
-        if check_mode == "METADATA":
-            issues += check_multiline_metadata(row, row_num, df)
-
-        for msg in issues:
-            errors.append({
-                "ID": cid,
-                "Title": title,
-                "Issue": msg
-            })
-
-    return errors
\ No newline at end of file
+    df = load_catalog(file_buffer, check_mode)
+    return validate_catalog_frame(df, check_mode)
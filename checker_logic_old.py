@@ -1,11 +1,31 @@
+import numpy as np
 import pandas as pd
 import math
 
-def _norm_str(val):
-    """Normalize string: trim, upper, handle None."""
-    if pd.isna(val) or val is None:
-        return ""
-    return str(val).strip()
+from catalog_columns import column_map
+from catalog_reader import read_catalog
+from error_table import ErrorTable
+from metrics import timed, timed_rule
+from rule_engine import (
+    CatalogCells,
+    DuplicateIndex,
+    RuleHits,
+    add_duplicate_hits,
+    format_errors,
+    publisher_expectations,
+    share_totals,
+    writer_counts,
+    writer_table,
+)
+
+# Exclusion List
+EXCLUSIONS = ["NRY", "NRYI", "YTO", "UATF", "UATFOS"]
+
+PUBLISHER_RULES = {
+    # Linked Publisher -> (Publisher Name, CAE No, Affiliation)
+    "ELITE EMBASSY PUBLISHING": ("ELITE EMBASSY PUBLISHING", "619851030", "BMI"),
+    "MUSIC EMBASSIES PUBLISHING": ("MUSIC EMBASSIES PUBLISHING", "741593140", "ASCAP"),
+}
 
 def _parse_float(val):
     """Parse numeric values safely."""
@@ -17,214 +37,187 @@ def _parse_float(val):
     except:
         return 0.0
 
-def _is_empty(val):
-    """Check if value is effectively empty."""
-    return _norm_str(val) == ""
+def _is_excluded(val):
+    """Exclusion check on a normalized value."""
+    val_norm = val.upper()
+    return any(exc in val_norm for exc in EXCLUSIONS)
 
-def _find_col(df, keywords):
-    """Find column using fuzzy matching."""
-    for col in df.columns:
-        c_upper = str(col).upper().strip()
-        if all(k.upper() in c_upper for k in keywords):
-            return col
-    return None
+def unreadable_file_errors(e):
+    """The all-in-one checker reports a file it cannot read as a single issue."""
+    return ErrorTable.from_dicts([{"ID": "N/A", "Title": "N/A", "Issue": f"System Error: Could not read Excel file. {str(e)}"}])
 
 def validate_catalog_file(file_buffer):
-    # Exclusion List
-    EXCLUSIONS = ["NRY", "NRYI", "YTO", "UATF", "UATFOS"]
-    
     try:
-        df = pd.read_excel(file_buffer)
+        with timed("parse"):
+            df = read_catalog(file_buffer)
     except Exception as e:
-        return [{"ID": "N/A", "Title": "N/A", "Issue": f"System Error: Could not read Excel file. {str(e)}"}]
-
-    errors = []
-
-    # --- Identify Columns (Fuzzy Search) ---
-    col_catalog = _find_col(df, ["EEP", "MASTER", "CATALOG"])
-    col_title = _find_col(df, ["TITLE"])
-    col_iswc = _find_col(df, ["ISWC"])
-    
-    # Release Details Columns
-    col_isrc = _find_col(df, ["RECORDING", "ISRC"])
-    col_release_date = _find_col(df, ["RECORDING", "RELEASE", "DATE", "CWR"])
-    col_rec_title = _find_col(df, ["RECORDING", "TITLE"])
-    col_upc = _find_col(df, ["ALBUM", "UPC"])
-    col_release_link = next((c for c in df.columns if str(c).upper().strip() == "RELEASE LINK"), None)
-    col_portal_link = _find_col(df, ["PORTAL", "LINK"])
-    
-    col_writer_total = _find_col(df, ["WRITER", "TOTAL"])
-
-    for idx, row in df.iterrows():
-        row_num = idx + 2 # Excel Row Number
-        
-        # --- Identification Data ---
-        cat_val = _norm_str(row.get(col_catalog)) if col_catalog else "Unknown ID"
-        title_val = _norm_str(row.get(col_title)) if col_title else "Unknown Title"
-        
-        def add_err(msg):
-            errors.append({
-                "ID": cat_val,
-                "Title": title_val,
-                "Issue": f"Row {row_num}: {msg}"
-            })
-
-        # --- Exclusion Check Helper ---
-        def is_excluded(val):
-            val_norm = _norm_str(val).upper()
-            return any(exc in val_norm for exc in EXCLUSIONS)
-
-        # --- ISWC Check ---
+        return unreadable_file_errors(e)
+
+    return validate_catalog_frame(df)
+
+def _check_duplicates(cells, hits, cmap, index=None):
+    """The same ISWC or ISRC on two rows (exclusion codes are not identifiers)."""
+    if index is None:
+        index = DuplicateIndex()
+    add_duplicate_hits(cells, hits, cmap.find(["ISWC"]), "ISWC", index, skip=_is_excluded)
+    add_duplicate_hits(cells, hits, cmap.find(["RECORDING", "ISRC"]), "ISRC", index, skip=_is_excluded)
+
+def _format(df, cells, hits, cmap):
+    col_catalog = cmap.find(["EEP", "MASTER", "CATALOG"])
+    col_title = cmap.find(["TITLE"])
+    cat_val = cells.text(col_catalog) if col_catalog else np.full(cells.n, "Unknown ID", dtype=object)
+    title_val = cells.text(col_title) if col_title else np.full(cells.n, "Unknown Title", dtype=object)
+    return format_errors(df, hits, cat_val, title_val)
+
+def duplicate_errors(df, seen=None):
+    """Only the cross-row issues of validate_catalog_frame, for callers checking rows in chunks."""
+    cells = CatalogCells.of(df)
+    hits = RuleHits(cells.n)
+    cmap = column_map(df)
+    with timed_rule("ALL IN ONE", "duplicates"):
+        _check_duplicates(cells, hits, cmap, seen)
+    with timed("format"):
+        return _format(df, cells, hits, cmap)
+
+def validate_catalog_frame(df, cross_row=True, seen=None):
+    """
+    All rules on a catalog frame. cross_row=False leaves out the duplicate
+    checks (for a chunk of a catalog); seen is the DuplicateIndex of the
+    batches read so far when a catalog is checked batch by batch.
+    """
+    cells = CatalogCells.of(df)
+    hits = RuleHits(cells.n)
+
+    # --- Identify Columns (Fuzzy Search, resolved once per header layout) ---
+    with timed("columns"):
+        cmap = column_map(df)
+        col_iswc = cmap.find(["ISWC"])
+
+        # Release Details Columns
+        col_isrc = cmap.find(["RECORDING", "ISRC"])
+        col_release_date = cmap.find(["RECORDING", "RELEASE", "DATE", "CWR"])
+        col_rec_title = cmap.find(["RECORDING", "TITLE"])
+        col_upc = cmap.find(["ALBUM", "UPC"])
+        col_release_link = cmap.exact("RELEASE LINK")
+        col_portal_link = cmap.find(["PORTAL", "LINK"])
+
+        col_writer_total = cmap.find(["WRITER", "TOTAL"])
+
+    # Rules run column by column over all rows; they are added in the
+    # order their messages appear for a single row.
+
+    # --- ISWC Check ---
+    with timed_rule("ALL IN ONE", "iswc"):
         if col_iswc:
-            iswc_val = _norm_str(row.get(col_iswc))
-            if not is_excluded(iswc_val):
-                if "." in iswc_val or "NOTES" in iswc_val.upper():
-                    add_err("ISWC has dots or Notes")
+            hits.add(
+                cells.test(col_iswc, lambda v: not _is_excluded(v) and ("." in v or "NOTES" in v.upper())),
+                "ISWC has dots or Notes",
+            )
 
-        # --- ISRC & Release Details ---
-        isrc_val = _norm_str(row.get(col_isrc)) if col_isrc else ""
-        rec_title_val = _norm_str(row.get(col_rec_title)) if col_rec_title else ""
-        rel_link_val = _norm_str(row.get(col_release_link)) if col_release_link else ""
-
-        has_isrc = not _is_empty(isrc_val)
-        has_rel_link = not _is_empty(rel_link_val)
+    # --- ISRC & Release Details ---
+    with timed_rule("ALL IN ONE", "release_info"):
+        has_isrc = ~cells.empty(col_isrc)
+        has_rel_link = ~cells.empty(col_release_link)
+        rel_link_excluded = cells.test(col_release_link, _is_excluded)
 
         # Rule: If ISRC is available -> Check Song Release Details
         # Skip these if ISRC, Rec Title, or Release Link contains an exclusion
-        if has_isrc and not any(is_excluded(v) for v in [isrc_val, rec_title_val, rel_link_val]):
-            if col_release_date and _is_empty(row.get(col_release_date)):
-                add_err("Recording Release Date (CWR) is missing or not matched")
-            
-            if col_rec_title and _is_empty(row.get(col_rec_title)):
-                add_err("Recording Title is missing or not matched")
-
-            if col_upc and _is_empty(row.get(col_upc)):
-                add_err("Album UPC is missing or not matched")
-
-            if col_release_link and _is_empty(rel_link_val):
-                add_err("Release Link is missing or not matched")
+        release_due = has_isrc & ~(cells.test(col_isrc, _is_excluded) | cells.test(col_rec_title, _is_excluded) | rel_link_excluded)
+        if col_release_date:
+            hits.add(release_due & cells.empty(col_release_date), "Recording Release Date (CWR) is missing or not matched")
+        if col_rec_title:
+            hits.add(release_due & cells.empty(col_rec_title), "Recording Title is missing or not matched")
+        if col_upc:
+            hits.add(release_due & cells.empty(col_upc), "Album UPC is missing or not matched")
+        if col_release_link:
+            hits.add(release_due & ~has_rel_link, "Release Link is missing or not matched")
 
         # Rule: Release Link Logic (Skip if exclusion found)
-        if has_rel_link and not is_excluded(rel_link_val):
-            if not has_isrc:
-                 add_err("Recording ISRC is missing or not matched (Required for Release Link)")
-            
-            if col_portal_link and _is_empty(row.get(col_portal_link)):
-                add_err("PORTAL LINK TO SONG is missing or not matched")
-
-        # --- Writers Section ---
-        # (Writers logic remains strict as per original code unless specified otherwise)
-        total_share = 0.0
-        w_total_val = row.get(col_writer_total) if col_writer_total else 0
-        w_count = 0
-        
-        if _is_empty(w_total_val):
-            add_err("Writer Total is missing or not matched")
+        link_due = has_rel_link & ~rel_link_excluded
+        hits.add(link_due & ~has_isrc, "Recording ISRC is missing or not matched (Required for Release Link)")
+        if col_portal_link:
+            hits.add(link_due & cells.empty(col_portal_link), "PORTAL LINK TO SONG is missing or not matched")
+
+    # --- Writers Section ---
+    # (Writers logic remains strict as per original code unless specified otherwise)
+    with timed_rule("ALL IN ONE", "writers"):
+        if col_writer_total:
+            wt_empty = cells.empty(col_writer_total)
+            hits.add(wt_empty, "Writer Total is missing or not matched")
+            w_count, valid = writer_counts(cells.raw(col_writer_total), wt_empty)
+            hits.add(~wt_empty & ~valid, "Writer Total is not a valid number")
         else:
-            try:
-                w_count = int(float(w_total_val))
-            except:
-                 add_err("Writer Total is not a valid number")
-
-        loop_limit = min(w_count, 20)
-        
-        for i in range(1, loop_limit + 1):
-            c_share_col = _find_col(df, [f"COMPOSER {i}", "SHARE"])
-            c_ctrl_col = _find_col(df, [f"COMPOSER {i}", "CONTROLLED"])
-            c_cap_col = _find_col(df, [f"COMPOSER {i}", "CAPACITY"])
-            c_link_pub_col = _find_col(df, [f"COMPOSER {i}", "LINKED", "PUBLISHER"])
-            
-            p_name_col = _find_col(df, [f"PUBLISHER {i}", "NAME"])
-            p_cae_col = _find_col(df, [f"PUBLISHER {i}", "CAE"])
-            p_aff_col = _find_col(df, [f"PUBLISHER {i}", "AFFILIATION"])
-            p_cap_col_fixed = _find_col(df, [f"PUBLISHER {i}", "CAPACITY"])
-            p_share_col = _find_col(df, [f"PUBLISHER {i}", "SHARE"])
-
-            c_share_raw = row.get(c_share_col) if c_share_col else None
-            c_share_val = 0.0
-            
-            if _is_empty(c_share_raw):
-                 add_err(f"Composer {i} Share is missing or not matched")
-            else:
-                c_share_val = _parse_float(c_share_raw)
-            
-            total_share += c_share_val
-
-            c_ctrl_val = _norm_str(row.get(c_ctrl_col)).upper() if c_ctrl_col else ""
-            if c_ctrl_val not in ["Y", "N"]:
-                add_err(f"Composer {i} Controlled is missing or not matched")
-
-            c_cap_val = _norm_str(row.get(c_cap_col)).upper() if c_cap_col else ""
-            if c_cap_val not in ["A", "C", "AC", "CA"]:
-                add_err(f"Composer {i} Capacity is missing or not matched")
-
-            link_pub_val = _norm_str(row.get(c_link_pub_col)) if c_link_pub_col else ""
-            if link_pub_val == "":
-                add_err(f"Composer {i} Linked Publisher is missing or not matched")
-            
-            is_elite = link_pub_val.upper() == "ELITE EMBASSY PUBLISHING"
-            is_music_emb = link_pub_val.upper() == "MUSIC EMBASSIES PUBLISHING"
-
-            if is_elite:
-                if _norm_str(row.get(p_name_col)).upper() != "ELITE EMBASSY PUBLISHING":
-                    add_err(f"Publisher {i} Name is missing or not matched")
-                p_cae_val = _norm_str(row.get(p_cae_col)).replace(".0", "")
-                if p_cae_val != "619851030":
-                     add_err(f"Publisher {i} CAE No is missing or not matched")
-                if _norm_str(row.get(p_aff_col)).upper() != "BMI":
-                    add_err(f"Publisher {i} Affiliation is missing or not matched")
-            
-            elif is_music_emb:
-                if _norm_str(row.get(p_name_col)).upper() != "MUSIC EMBASSIES PUBLISHING":
-                    add_err(f"Publisher {i} Name is missing or not matched")
-                p_cae_val = _norm_str(row.get(p_cae_col)).replace(".0", "")
-                if p_cae_val != "741593140":
-                     add_err(f"Publisher {i} CAE No is missing or not matched")
-                if _norm_str(row.get(p_aff_col)).upper() != "ASCAP":
-                    add_err(f"Publisher {i} Affiliation is missing or not matched")
-
-            p_cap_val = _norm_str(row.get(p_cap_col_fixed)).upper() if p_cap_col_fixed else ""
-            if p_cap_val != "OP":
-                add_err(f"Publisher {i} Capacity is missing or not matched (Should be OP)")
-
-            p_share_raw = row.get(p_share_col) if p_share_col else 0
-            if _is_empty(p_share_raw):
-                add_err(f"Publisher {i} Share is missing or not matched")
-            else:
-                p_share_val = _parse_float(p_share_raw)
-                if abs(p_share_val - c_share_val) > 0.01:
-                    add_err(f"Publisher {i} Share does not match Composer {i} Share")
-
-        if w_count > 0:
-            if abs(total_share - 100.0) > 0.1:
-                 add_err(f"Total Share is not 100% (Found {total_share}%)")
-                 
-        # Alternate Title Check
-        col_alt_source = _find_col(df, ["ALTERNATE", "TITLE"])
+            w_count = np.zeros(cells.n, dtype=np.int64)
+
+        # one row per (catalog row, writer slot) for slots 1..min(Writer Total, 20)
+        wt = writer_table(cells, cmap, w_count, _parse_float)
+
+        with hits.per_slot():
+            hits.add_slots(wt, wt["c_share_empty"], "Composer {i} Share is missing or not matched")
+
+            hits.add_slots(wt, ~wt["c_ctrl"].isin(["Y", "N"]), "Composer {i} Controlled is missing or not matched")
+
+            hits.add_slots(wt, ~wt["c_cap"].isin(["A", "C", "AC", "CA"]), "Composer {i} Capacity is missing or not matched")
+
+            hits.add_slots(wt, wt["c_link"] == "", "Composer {i} Linked Publisher is missing or not matched")
+
+            # Elite Embassy / Music Embassies publisher details, joined on Linked Publisher
+            _, name_bad, cae_bad, aff_bad = publisher_expectations(wt, PUBLISHER_RULES)
+            hits.add_slots(wt, name_bad, "Publisher {i} Name is missing or not matched")
+            hits.add_slots(wt, cae_bad, "Publisher {i} CAE No is missing or not matched")
+            hits.add_slots(wt, aff_bad, "Publisher {i} Affiliation is missing or not matched")
+
+            hits.add_slots(wt, wt["p_cap"] != "OP", "Publisher {i} Capacity is missing or not matched (Should be OP)")
+
+            # a missing Publisher Share column counts as 0
+            p_share_empty = wt["has_p_share"] & wt["p_share_empty"]
+            hits.add_slots(wt, p_share_empty, "Publisher {i} Share is missing or not matched")
+            c_share_val = np.where(wt["c_share_empty"], 0.0, wt["c_share"])
+            with np.errstate(invalid="ignore"):
+                share_off = np.abs(wt["p_share"].to_numpy() - c_share_val) > 0.01
+            hits.add_slots(wt, ~p_share_empty & share_off, "Publisher {i} Share does not match Composer {i} Share")
+
+        total_share = share_totals(wt, cells.n)
+        with np.errstate(invalid="ignore"):
+            share_off = (w_count > 0) & (np.abs(total_share - 100.0) > 0.1)
+        hits.add_rows(
+            np.flatnonzero(share_off), "Total Share is not 100% (Found {d}%)",
+            detail=total_share[share_off].tolist(),
+        )
+
+    # Alternate Title Check
+    with timed_rule("ALL IN ONE", "aka"):
+        col_alt_source = cmap.find(["ALTERNATE", "TITLE"])
         if col_alt_source:
-            alt_raw = _norm_str(row.get(col_alt_source))
-            if alt_raw:
-                alt_lines = [l.strip() for l in alt_raw.split('\n') if l.strip()]
-                for i, line in enumerate(alt_lines, 1):
-                    col_aka = _find_col(df, ["AKA", str(i)])
-                    if col_aka:
-                        if _norm_str(row.get(col_aka)).upper() != line.upper():
-                            add_err(f"AKA {i} does not match Alternate Title line {i}")
-                    else:
-                        add_err(f"Column AKA {i} missing for Alternate Title line {i}")
-
-        # Artist(s) Check
-        col_art_source = _find_col(df, ["ARTIST(S)"])
+            pos, line_no, line_text = cells.lines(col_alt_source)
+            for i in np.unique(line_no).tolist():
+                sel = line_no == i
+                col_aka = cmap.find(["AKA", str(i)])
+                if col_aka:
+                    bad = cells.upper(col_aka)[pos[sel]] != line_text[sel]
+                    hits.add_rows(pos[sel][bad], "AKA {i} does not match Alternate Title line {i}", index=i)
+                else:
+                    hits.add_rows(pos[sel], "Column AKA {i} missing for Alternate Title line {i}", index=i)
+
+    # Artist(s) Check
+    with timed_rule("ALL IN ONE", "artists"):
+        col_art_source = cmap.find(["ARTIST(S)"])
         if col_art_source:
-            art_raw = _norm_str(row.get(col_art_source))
-            if art_raw:
-                art_lines = [l.strip() for l in art_raw.split('\n') if l.strip()]
-                for i, line in enumerate(art_lines, 1):
-                    col_target = _find_col(df, ["RECORDING", "DISPLAY", "ARTIST", str(i)])
-                    if col_target:
-                        if _norm_str(row.get(col_target)).upper() != line.upper():
-                            add_err(f"Recording Display Artist {i} does not match Artist line {i}")
-                    else:
-                        add_err(f"Column Recording Display Artist {i} missing for Artist line {i}")
-
-    return errors
\ No newline at end of file
+            pos, line_no, line_text = cells.lines(col_art_source)
+            for i in np.unique(line_no).tolist():
+                sel = line_no == i
+                col_target = cmap.find(["RECORDING", "DISPLAY", "ARTIST", str(i)])
+                if col_target:
+                    bad = cells.upper(col_target)[pos[sel]] != line_text[sel]
+                    hits.add_rows(pos[sel][bad], "Recording Display Artist {i} does not match Artist line {i}", index=i)
+                else:
+                    hits.add_rows(pos[sel], "Column Recording Display Artist {i} missing for Artist line {i}", index=i)
+
+    # --- Duplicate Identifiers (across rows) ---
+    if cross_row:
+        with timed_rule("ALL IN ONE", "duplicates"):
+            _check_duplicates(cells, hits, cmap, seen)
+
+    # --- Identification Data ---
+    with timed("format"):
+        return _format(df, cells, hits, cmap)
@@ -0,0 +1,159 @@
+"""
+Check catalogs from the command line, without the web app.
+
+    python cli.py catalogs/ --mode "ALL IN ONE" > issues.ndjson
+    python cli.py a.xlsx b.csv --format csv --output issues.csv
+    python cli.py archive/ --format xlsx --output "Issues.xlsx" --workers 8
+
+Directories are searched recursively for .xlsx, .xls, .csv and .parquet
+files. Files are checked in parallel, one worker process per file (a
+single file is split over the workers by rows instead). Issues go to
+--output or stdout; a per-file summary goes to stderr.
+
+Exit status: 0 no issues, 1 issues found, 2 a file could not be checked
+(or bad arguments).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from checker_logic import MODE_RULES, load_catalog
+from parallel_check import (
+    CATALOG_EXTENSIONS,
+    PARALLEL_MIN_ROWS,
+    validate_catalog_frame_parallel,
+    validate_catalogs_parallel,
+)
+from result_store import write_batch_report
+
+FORMATS = ["ndjson", "csv", "xlsx"]
+
+EXIT_OK = 0
+EXIT_ISSUES = 1
+EXIT_FAILED = 2
+
+
+# ---------- INPUT ---------- #
+
+def find_catalogs(paths):
+    """Catalog files among paths, directories searched recursively (sorted, hidden files skipped)."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                found += [
+                    os.path.join(root, name) for name in sorted(names)
+                    if not name.startswith(".") and name.lower().endswith(CATALOG_EXTENSIONS)
+                ]
+        elif os.path.isfile(path):
+            found.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return found
+
+
+def check_catalogs(paths, check_mode="ALL IN ONE", workers=None):
+    """Per-file results as from parallel_check.validate_catalogs_parallel."""
+    if len(paths) != 1:
+        return validate_catalogs_parallel([(p, p) for p in paths], check_mode, workers)
+
+    # one file: spread its rows over the workers instead
+    path = paths[0]
+    try:
+        # parsed here: the all-in-one checker would report an unreadable
+        # file as an issue instead of failing
+        with open(path, "rb") as fh:
+            df = load_catalog(fh, check_mode)
+        errors = validate_catalog_frame_parallel(df, check_mode, workers, PARALLEL_MIN_ROWS)
+    except Exception as e:
+        return [{"file": path, "status": "failed", "count": 0, "errors": [], "error": str(e)}]
+    return [{"file": path, "status": "issues_found" if errors else "success", "count": len(errors), "errors": errors}]
+
+
+# ---------- OUTPUT ---------- #
+
+def _rows(results):
+    """One {File, ID, Title, Issue} dict per issue; a file that failed gives one row."""
+    for r in results:
+        if r["status"] == "failed":
+            yield {"File": r["file"], "ID": "N/A", "Title": "N/A", "Issue": f"System Error: Could not check file. {r['error']}"}
+        for err in r["errors"]:
+            yield {"File": r["file"], **err}
+
+
+def write_ndjson(results, fh):
+    for row in _rows(results):
+        fh.write(json.dumps(row) + "\n")
+
+
+def write_csv(results, fh):
+    writer = csv.DictWriter(fh, fieldnames=["File", "ID", "Title", "Issue"])
+    writer.writeheader()
+    writer.writerows(_rows(results))
+
+
+def write_xlsx(results, fh):
+    # the /check_batch report: one sheet per file
+    write_batch_report([r["file"] for r in results], _rows(results), fh)
+
+
+WRITERS = {"ndjson": write_ndjson, "csv": write_csv, "xlsx": write_xlsx}
+
+
+def write_results(results, fmt, output=None):
+    if fmt == "xlsx":
+        with open(output, "wb") as fh:
+            write_xlsx(results, fh)
+    elif output:
+        with open(output, "w", encoding="utf-8", newline="") as fh:
+            WRITERS[fmt](results, fh)
+    else:
+        WRITERS[fmt](results, sys.stdout)
+
+
+def exit_status(results):
+    if any(r["status"] == "failed" for r in results):
+        return EXIT_FAILED
+    if any(r["count"] for r in results):
+        return EXIT_ISSUES
+    return EXIT_OK
+
+
+# ---------- MAIN ---------- #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check catalog files without the web app.")
+    parser.add_argument("paths", nargs="+", help="catalog files or directories")
+    parser.add_argument("--mode", default="ALL IN ONE", choices=list(MODE_RULES))
+    parser.add_argument("--format", default="ndjson", choices=FORMATS)
+    parser.add_argument("--output", help="write issues here instead of stdout (required for xlsx)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--quiet", action="store_true", help="no per-file summary on stderr")
+    args = parser.parse_args(argv)
+
+    if args.format == "xlsx" and not args.output:
+        parser.error("--format xlsx needs --output")
+    try:
+        paths = find_catalogs(args.paths)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return EXIT_FAILED
+    if not paths:
+        print("No catalog files found", file=sys.stderr)
+        return EXIT_FAILED
+
+    results = check_catalogs(paths, args.mode, args.workers)
+    write_results(results, args.format, args.output)
+
+    if not args.quiet:
+        for r in results:
+            detail = r["error"] if r["status"] == "failed" else f"{r['count']} issues"
+            print(f"{r['file']}: {r['status']} ({detail})", file=sys.stderr)
+    return exit_status(results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
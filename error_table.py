@@ -0,0 +1,284 @@
+import re
+
+import numpy as np
+
+# format_errors prefixes every issue with its Excel row number
+ROW_ISSUE = re.compile(r"^Row (\d+): (.*)$", re.S)
+
+_PLACEHOLDER = re.compile(r"\{[^{}]*\}")
+_FIELD = re.compile(r"\{\{|\}\}|\{[^{}]*\}")
+_NOT_WORD = re.compile(r"[^a-z0-9]+")
+_codes = {}
+
+
+def rule_code(template):
+    """Short name of a message template: "Composer {i} Share is missing" -> "composer_share_is_missing"."""
+    code = _codes.get(template)
+    if code is None:
+        words = _PLACEHOLDER.sub(" ", template.replace("{{", "").replace("}}", "")).lower()
+        code = _codes[template] = _NOT_WORD.sub("_", words).strip("_") or "issue"
+    return code
+
+
+def rule_label(template):
+    """A template as shown to users: "AKA {i} does not match {d}" -> "AKA # does not match ..."."""
+    shown = {"{{": "{", "}}": "}", "{i}": "#"}
+    return _FIELD.sub(lambda m: shown.get(m.group(0), "..."), template)
+
+
+def summarize(templates, counts, examples, rows):
+    """
+    ErrorTable.summary() from the count of records of each template, the
+    first message of each template in use ({template index: message}) and
+    the number of rows with issues.
+    """
+    by_code = {}
+    first = {}
+    for k, template in enumerate(templates):
+        if counts[k]:
+            code = rule_code(template)
+            by_code[code] = by_code.get(code, 0) + int(counts[k])
+            first.setdefault(code, k)
+    entries = [
+        {
+            "rule": code,
+            "label": rule_label(templates[first[code]]),
+            "example": examples[first[code]],
+            "count": count,
+        }
+        for code, count in by_code.items()
+    ]
+    entries.sort(key=lambda e: -e["count"])
+    return {"count": int(sum(counts)), "rows": int(rows), "rules": entries}
+
+
+def object_array(values, n):
+    """An object array of n values; a single value (str, tuple, None...) is repeated."""
+    out = np.empty(n, dtype=object)
+    if values is None or isinstance(values, (str, tuple)) or np.isscalar(values):
+        out.fill(values)
+    else:
+        # element by element: numpy would unpack tuple values into a 2-D array
+        for k, v in enumerate(values):
+            out[k] = v
+    return out
+
+
+class ErrorTable:
+    """
+    Check errors in compact form: one record per issue holding its Excel
+    row (0 for issues about the whole file), rule (an index into
+    templates), index (the writer slot or line number) and detail (a
+    column name, a total, an identifier...). Messages are the templates
+    formatted with {i} = index and {d} = detail, only when they are read.
+
+    A table reads like the old error lists: iterating, indexing and
+    dicts() give flat {"ID", "Title", "Issue"} dicts ("File" first for a
+    batch), and it compares equal to such a list.
+    """
+
+    def __init__(self, templates, rows, rules, index, detail, ids, titles, files=None):
+        self.templates = list(templates)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.rules = np.asarray(rules, dtype=np.int64)
+        self.index = np.asarray(index, dtype=np.int64)
+        self.detail = detail
+        self.ids = ids
+        self.titles = titles
+        self.files = files
+
+    @classmethod
+    def empty(cls):
+        nothing = np.zeros(0, dtype=object)
+        return cls([], [], [], [], nothing, nothing, nothing)
+
+    @classmethod
+    def from_dicts(cls, errors):
+        """A table of flat error dicts; each distinct message becomes its own rule."""
+        errors = list(errors)
+        n = len(errors)
+        templates, rule_ids = [], {}
+        rows, rules = np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+        for k, err in enumerate(errors):
+            match = ROW_ISSUE.match(err.get("Issue", ""))
+            message = err.get("Issue", "") if match is None else match.group(2)
+            rows[k] = 0 if match is None else int(match.group(1))
+            template = message.replace("{", "{{").replace("}", "}}")
+            if template not in rule_ids:
+                rule_ids[template] = len(templates)
+                templates.append(template)
+            rules[k] = rule_ids[template]
+        files = None
+        if any("File" in err for err in errors):
+            files = object_array([err.get("File") for err in errors], n)
+        return cls(
+            templates, rows, rules, np.zeros(n, dtype=np.int64), object_array(None, n),
+            object_array([err.get("ID") for err in errors], n),
+            object_array([err.get("Title") for err in errors], n),
+            files,
+        )
+
+    @classmethod
+    def concat(cls, tables):
+        """One table of several, in order."""
+        tables = [t if isinstance(t, ErrorTable) else cls.from_dicts(t) for t in tables]
+        if len(tables) == 1:
+            return tables[0]
+        templates, rule_ids, rules = [], {}, []
+        for t in tables:
+            remap = np.zeros(len(t.templates), dtype=np.int64)
+            for k, template in enumerate(t.templates):
+                if template not in rule_ids:
+                    rule_ids[template] = len(templates)
+                    templates.append(template)
+                remap[k] = rule_ids[template]
+            rules.append(remap[t.rules])
+
+        def joined(name):
+            return np.concatenate([getattr(t, name) for t in tables]) if tables else np.zeros(0, dtype=object)
+
+        files = None
+        if any(t.files is not None for t in tables):
+            files = np.concatenate([t.files if t.files is not None else object_array(None, len(t)) for t in tables])
+        return cls(
+            templates, joined("rows"), np.concatenate(rules) if rules else [], joined("index"),
+            joined("detail"), joined("ids"), joined("titles"), files,
+        )
+
+    @classmethod
+    def merge_by_row(cls, tables):
+        """Merge row-ordered tables into one; a row's errors from earlier tables come first."""
+        table = cls.concat(tables)
+        return table.take(np.argsort(table.rows, kind="stable"))
+
+    # ---------- SELECTION ---------- #
+
+    def __len__(self):
+        return len(self.rows)
+
+    def take(self, positions):
+        """The records at positions (an index array or boolean mask), templates unchanged."""
+        return ErrorTable(
+            self.templates, self.rows[positions], self.rules[positions], self.index[positions],
+            self.detail[positions], self.ids[positions], self.titles[positions],
+            None if self.files is None else self.files[positions],
+        )
+
+    def codes(self):
+        """rule_code of each template."""
+        return [rule_code(t) for t in self.templates]
+
+    def rule_mask(self, test):
+        """Per record: does test(template) hold for its rule?"""
+        return np.array([bool(test(t)) for t in self.templates] + [False])[self.rules]
+
+    def select(self, rules=None, row_from=None, row_to=None, file=None):
+        """Records of the given rule codes, in a row range (inclusive) and file; None means any."""
+        mask = np.ones(len(self), dtype=bool)
+        if rules:
+            wanted = set(rules)
+            mask &= self.rule_mask(lambda t: rule_code(t) in wanted)
+        if row_from is not None:
+            mask &= self.rows >= row_from
+        if row_to is not None:
+            mask &= self.rows <= row_to
+        if file is not None and self.files is not None:
+            mask &= self.files == file
+        return self.take(mask)
+
+    # ---------- FLAT ERRORS ---------- #
+
+    def _messages(self, start, stop):
+        rules = self.rules[start:stop].tolist()
+        index = self.index[start:stop].tolist()
+        detail = self.detail[start:stop].tolist()
+        templates = self.templates
+        plain = [None if "{" in t else t.replace("}}", "}") for t in templates]
+        return [
+            plain[r] if plain[r] is not None else templates[r].format(i=i, d=d)
+            for r, i, d in zip(rules, index, detail)
+        ]
+
+    def dicts(self, start=0, stop=None):
+        """Flat error dicts of records start:stop."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        rows = self.rows[start:stop].tolist()
+        ids = self.ids[start:stop].tolist()
+        titles = self.titles[start:stop].tolist()
+        issues = [
+            f"Row {r}: {m}" if r else m
+            for r, m in zip(rows, self._messages(start, stop))
+        ]
+        if self.files is None:
+            return [{"ID": i, "Title": t, "Issue": m} for i, t, m in zip(ids, titles, issues)]
+        files = self.files[start:stop].tolist()
+        return [{"File": f, "ID": i, "Title": t, "Issue": m} for f, i, t, m in zip(files, ids, titles, issues)]
+
+    def __iter__(self):
+        for start in range(0, len(self), 10000):
+            yield from self.dicts(start, start + 10000)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                return self.dicts()[key]
+            return self.dicts(key.start or 0, key.stop)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("error index out of range")
+        return self.dicts(key, key + 1)[0]
+
+    def __eq__(self, other):
+        if isinstance(other, (ErrorTable, list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<ErrorTable {len(self)} errors, {len(self.templates)} rules>"
+
+    # ---------- SUMMARY AND PAGES ---------- #
+
+    def examples(self):
+        """{template index: message of its first record} for the templates in use."""
+        rules, first = np.unique(self.rules, return_index=True)
+        return {int(k): self._messages(pos, pos + 1)[0] for k, pos in zip(rules.tolist(), first.tolist())}
+
+    def summary(self):
+        """
+        Counts by rule, most frequent first:
+        {"count", "rows" (rows with issues), "rules": [{"rule", "label", "example", "count"}, ...]}
+        """
+        counts = np.bincount(self.rules, minlength=len(self.templates))
+        return summarize(self.templates, counts, self.examples(), len(np.unique(self.rows)))
+
+    def compact(self, start=0, stop=None):
+        """
+        Records start:stop without formatting, each ID and Title given once:
+        {"templates": [...], "codes": [...], "owners": [[ID, Title], ...],
+         "issues": [[row, rule, index, detail, owner], ...]}
+        ("files": [...], one per issue, for a batch)
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        owners, owner_ids, owner = [], {}, []
+        for key in zip(self.ids[start:stop].tolist(), self.titles[start:stop].tolist()):
+            if key not in owner_ids:
+                owner_ids[key] = len(owners)
+                owners.append(list(key))
+            owner.append(owner_ids[key])
+        body = {
+            "templates": self.templates,
+            "codes": self.codes(),
+            "owners": owners,
+            "issues": [
+                list(record) for record in zip(
+                    self.rows[start:stop].tolist(), self.rules[start:stop].tolist(),
+                    self.index[start:stop].tolist(), self.detail[start:stop].tolist(), owner,
+                )
+            ],
+        }
+        if self.files is not None:
+            body["files"] = self.files[start:stop].tolist()
+        return body
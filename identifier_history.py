@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+
+from catalog_columns import column_map
+from checker_logic_old import _is_excluded
+from error_table import ErrorTable
+from rule_engine import (
+    CROSS_ROW_PREFIX,
+    CatalogCells,
+    RuleHits,
+    format_errors,
+    identifier_key,
+    identifier_text,
+    looks_like_identifier,
+)
+
+# (kind, column keywords), in the order a row's messages appear
+IDENTIFIERS = [
+    ("ISWC", ["ISWC"]),
+    ("ISRC", ["RECORDING", "ISRC"]),
+    ("UPC", ["ALBUM", "UPC"]),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS identifiers (
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    work TEXT NOT NULL,
+    source TEXT NOT NULL,
+    recorded REAL NOT NULL,
+    PRIMARY KEY (kind, value, work, source)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS identifiers_source ON identifiers (source);
+"""
+
+# An ISWC or ISRC belongs to one work, a UPC to one album. An identifier
+# collides with another source's if that source has it on a different work
+# and never on this row's work (or, for a UPC, any work of the album here):
+# a catalog re-sent under another name is the same catalog.
+COLLISIONS = """
+SELECT u.pos, u.kind, h.work, MIN(h.source)
+FROM upload u JOIN identifiers h ON h.kind = u.kind AND h.value = u.value
+WHERE h.source != ? AND h.work != u.work
+AND NOT EXISTS (
+    SELECT 1 FROM identifiers s JOIN upload w ON w.kind = s.kind AND w.value = s.value AND w.work = s.work
+    WHERE s.kind = u.kind AND s.value = u.value AND s.source = h.source
+    AND (u.kind = 'UPC' OR w.pos = u.pos)
+)
+GROUP BY u.pos, u.kind
+"""
+
+
+def catalog_identifiers(df):
+    """
+    (row position, kind, key, work, cell text) of every ISWC, ISRC and
+    Album UPC in the catalog; blanks, exclusion codes and values not shaped
+    like an identifier (looks_like_identifier) are left out.
+    work is the row's EEP Master Catalog Number.
+    """
+    cells = CatalogCells.of(df)
+    cmap = column_map(df)
+    work = cells.text(cmap.find(["EEP", "CATALOG"]))
+    found = []
+    for kind, keywords in IDENTIFIERS:
+        col = cmap.find(keywords)
+        if not col:
+            continue
+        keys = cells.map(
+            col, lambda v, kind=kind: identifier_key(v) if looks_like_identifier(kind, v) and not _is_excluded(v) else "",
+            dtype=object,
+        )
+        text = cells.map(col, identifier_text, dtype=object)
+        for pos in np.flatnonzero(keys != "").tolist():
+            found.append((pos, kind, keys[pos], work[pos], text[pos]))
+    return found
+
+
+class IdentifierHistory:
+    """
+    ISWCs, ISRCs and Album UPCs of catalogs checked before, in a local
+    SQLite database. An upload is checked against catalogs from other
+    sources: an ISWC or ISRC registered to a different work, or a UPC
+    used for other works, is reported (see COLLISIONS). Recording a
+    catalog replaces what was stored for its source (e.g. the label's
+    name) before.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def collisions(self, df, source, found=None):
+        """
+        ErrorTable (format_errors style) of rows whose identifiers collide with
+        history; found is catalog_identifiers(df) if already at hand.
+        """
+        if found is None:
+            found = catalog_identifiers(df)
+        if not found:
+            return ErrorTable.empty()
+        with closing(self._connect()) as db:
+            db.execute("CREATE TEMP TABLE upload (pos INTEGER, kind TEXT, value TEXT, work TEXT)")
+            db.execute("CREATE INDEX upload_key ON upload (kind, value, work)")
+            db.executemany("INSERT INTO upload VALUES (?, ?, ?, ?)", [f[:4] for f in found])
+            matches = {(pos, kind): (work, other) for pos, kind, work, other in db.execute(COLLISIONS, (source,))}
+        if not matches:
+            return ErrorTable.empty()
+
+        text = {(f[0], f[1]): f[4] for f in found}
+        hits = RuleHits(len(df))
+        for kind, _ in IDENTIFIERS:
+            hit = sorted(pos for pos, k in matches if k == kind)
+            if not hit:
+                continue
+            if kind == "UPC":
+                template = CROSS_ROW_PREFIX + "Album UPC {d[0]}: already used in {d[2]}"
+            else:
+                template = CROSS_ROW_PREFIX + kind + " {d[0]}: registered to {d[1]} in {d[2]}"
+            hits.add_rows(
+                np.array(hit, dtype=np.intp), template,
+                detail=[(text[p, kind],) + matches[p, kind] for p in hit],
+            )
+
+        cells = CatalogCells.of(df)
+        cmap = column_map(df)
+        col_catalog = cmap.find(["EEP", "CATALOG"])
+        col_title = cmap.find(["TITLE"])
+        ids = np.where(cells.empty(col_catalog), "Unknown ID", cells.text(col_catalog))
+        titles = np.where(cells.empty(col_title), "Unknown Title", cells.text(col_title))
+        return format_errors(df, hits, ids, titles)
+
+    def record(self, found, source):
+        """Store identifiers (from catalog_identifiers) as source's, replacing its earlier ones."""
+        now = time.time()
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM identifiers WHERE source = ?", (source,))
+            db.executemany(
+                "INSERT OR IGNORE INTO identifiers VALUES (?, ?, ?, ?, ?)",
+                [(kind, key, work, source, now) for _, kind, key, work, _ in found],
+            )
@@ -0,0 +1,112 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from catalog_columns import column_map
+from checker_logic import column_plan
+from error_table import ROW_ISSUE, ErrorTable
+from rule_engine import CatalogCells, is_cross_row
+
+
+# ---------- ROW FINGERPRINTS ---------- #
+
+def row_fingerprints(df, check_mode="ALL IN ONE"):
+    """
+    What a later upload needs to reuse this check's results:
+      layout  the mode and the columns its rules read (results are only
+              reused when both are unchanged)
+      keys    EEP Master Catalog Number of each row
+      hashes  hash of each row's cells in those columns
+
+    Hashes include the column dtypes, so a column that reads differently
+    (e.g. int -> float after a blank was added) marks every row changed.
+    """
+    plan = column_plan(check_mode)
+    cols = [
+        c for k, c in enumerate(df.columns)
+        if k == 0 or check_mode == "ALL IN ONE" or plan.wants(c)
+    ]
+    col_catalog = column_map(df).find(["EEP", "CATALOG"])
+    return {
+        "layout": [check_mode] + [str(c) for c in cols],
+        "keys": CatalogCells.of(df).text(col_catalog).tolist(),
+        "hashes": pd.util.hash_pandas_object(df[cols], index=False).tolist(),
+    }
+
+
+def _split_issue(err):
+    """(row number or None, issue text without the row prefix)"""
+    match = ROW_ISSUE.match(err.get("Issue", ""))
+    if match is None:
+        return None, err.get("Issue", "")
+    return int(match.group(1)), match.group(2)
+
+
+# ---------- RE-VALIDATION ---------- #
+
+def revalidate(df, check_mode, fingerprints, validate, baseline_rows=None, baseline_errors=None):
+    """
+    Errors for df, re-checking only rows that are new or changed since the
+    baseline result (an ErrorTable). A row is unchanged when a baseline row
+    has the same catalog number and cell hash; its stored issues are
+    reused with the row number updated. validate(frame) checks the other
+    rows (keeping their index, so row numbers hold) with the per-row rules only.
+
+    Returns (per-row errors, rows re-checked). Cross-row issues
+    (duplicates) depend on other rows, so they are never reused: the
+    caller checks the whole catalog for them and merges them in.
+    """
+    reuse = {}
+    if baseline_rows and baseline_errors is not None and baseline_rows.get("layout") == fingerprints["layout"]:
+        # baseline frames are indexed from 0, i.e. Excel row 2
+        for pos, key in enumerate(zip(baseline_rows["keys"], baseline_rows["hashes"])):
+            reuse[key] = pos + 2
+
+    keys = list(zip(fingerprints["keys"], fingerprints["hashes"]))
+    changed = [pos for pos, key in enumerate(keys) if key not in reuse]
+    if len(changed) == len(keys):
+        return validate(df), len(changed)
+
+    fresh = validate(df.iloc[changed]) if changed else ErrorTable.empty()
+
+    # the baseline's records of each unchanged row, renumbered
+    stored = baseline_errors.take(~is_cross_row(baseline_errors))
+    changed = set(changed)
+    unchanged = [pos for pos in range(len(keys)) if pos not in changed]
+    old_rows = np.array([reuse[keys[pos]] for pos in unchanged], dtype=np.int64)
+    start = np.searchsorted(stored.rows, old_rows, side="left")
+    counts = np.searchsorted(stored.rows, old_rows, side="right") - start
+    offsets = np.repeat(start - (np.cumsum(counts) - counts), counts)
+    reused = stored.take(offsets + np.arange(counts.sum()))
+    reused.rows = np.repeat(df.index.to_numpy()[unchanged] + 2, counts)
+    return ErrorTable.merge_by_row([reused, fresh]), len(changed)
+
+
+def diff_issues(previous, current):
+    """
+    Split issues into new, resolved and unchanged ones, matched on ID,
+    Title and issue text (row numbers may shift between uploads).
+    Returns {"new": [...], "resolved": [...], "unchanged": [...]};
+    resolved issues keep their baseline row numbers.
+    """
+    def ident(err):
+        return err.get("ID"), err.get("Title"), _split_issue(err)[1]
+
+    # each side is read twice below: a generator would be empty the second time
+    previous, current = list(previous), list(current)
+    before = Counter(map(ident, previous))
+    after = Counter(map(ident, current))
+
+    def split(errors, other):
+        seen = Counter()
+        kept, extra = [], []
+        for err in errors:
+            k = ident(err)
+            seen[k] += 1
+            (kept if seen[k] <= other[k] else extra).append(err)
+        return kept, extra
+
+    unchanged, new = split(current, before)
+    _, resolved = split(previous, after)
+    return {"new": new, "resolved": resolved, "unchanged": unchanged}
@@ -0,0 +1,130 @@
+import io
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from checker_logic import validate_catalog_file
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _run_check(source, check_mode):
+    # runs in a worker process; a path is the job's own copy of the upload
+    if isinstance(source, str):
+        try:
+            with open(source, "rb") as fh:
+                return validate_catalog_file(fh, check_mode=check_mode)
+        finally:
+            os.remove(source)
+    return validate_catalog_file(io.BytesIO(source), check_mode=check_mode)
+
+
+class JobQueue:
+    """
+    Catalog checks run in a local process pool.
+    At most max_pending jobs may be queued or running; finished jobs are
+    kept for result_ttl seconds and then forgotten.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8, result_ttl=3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _start(self, source, check_mode):
+        try:
+            return self._pool().submit(_run_check, source, check_mode)
+        except BrokenProcessPool:
+            # a worker died (e.g. killed when out of memory): start a new pool
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            return self._pool().submit(_run_check, source, check_mode)
+
+    def _purge(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished"] is not None and now - job["finished"] > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, source, check_mode):
+        """
+        Queue a check of an upload; returns the job id. source is the
+        uploaded bytes, or the path of a copy the job deletes once checked.
+        """
+        with self._lock:
+            now = time.time()
+            self._purge(now)
+            pending = sum(1 for job in self._jobs.values() if job["finished"] is None)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} checks already waiting, try again shortly")
+
+            # registered only once the pool has taken it
+            future = self._start(source, check_mode)
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "check_mode": check_mode,
+                "path": source if isinstance(source, str) else None,
+                "submitted": now,
+                "finished": None,
+                "errors": None,
+                "error": None,
+                "future": future,
+            }
+
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            try:
+                job["errors"] = future.result()
+            except Exception as e:
+                job["error"] = str(e)
+                # a worker that died never got to delete the job's copy
+                if job["path"] is not None and os.path.exists(job["path"]):
+                    os.remove(job["path"])
+            job["finished"] = time.time()
+            job.pop("future", None)
+            job.pop("path", None)
+
+    def status(self, job_id):
+        """
+        Job state, or None for unknown/expired ids:
+        {"status": "queued" | "running" | "done" | "failed", "check_mode", "errors"?, "error"?}
+        """
+        with self._lock:
+            self._purge(time.time())
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            if job["finished"] is None:
+                future = job.get("future")
+                state = "running" if future is not None and future.running() else "queued"
+                return {"status": state, "check_mode": job["check_mode"]}
+            if job["error"] is not None:
+                return {"status": "failed", "check_mode": job["check_mode"], "error": job["error"]}
+            return {"status": "done", "check_mode": job["check_mode"], "errors": job["errors"]}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
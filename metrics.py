@@ -0,0 +1,167 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(k, "") for k in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(k, "") for k in self.labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[slot] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                running = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    running += count
+                    le = _labels(self.labels, key, [("le", _number(bound))])
+                    lines.append(f"{self.name}_bucket{le} {running}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---------- CHECKER METRICS ---------- #
+# Per process: rule and column timings of checks run in /jobs or
+# CHECK_WORKERS worker processes are not included here.
+
+REGISTRY = Registry()
+
+CHECKS = REGISTRY.counter("ebichecker_checks_total", "Catalog checks by endpoint, mode and outcome", ["endpoint", "mode", "status"])
+ROWS = REGISTRY.counter("ebichecker_rows_checked_total", "Catalog rows checked", ["mode"])
+ERRORS = REGISTRY.counter("ebichecker_errors_found_total", "Issues reported", ["mode"])
+UPLOAD_BYTES = REGISTRY.counter("ebichecker_upload_bytes_total", "Bytes of uploaded catalogs", ["endpoint"])
+
+REQUEST_SECONDS = REGISTRY.histogram("ebichecker_request_seconds", "Check request latency", ["endpoint", "mode"])
+PHASE_SECONDS = REGISTRY.histogram("ebichecker_phase_seconds", "Time per check phase", ["phase"])
+RULE_SECONDS = REGISTRY.histogram("ebichecker_rule_seconds", "Time per rule family", ["mode", "rule"])
+
+_local = threading.local()
+
+
+@contextmanager
+def request_timings(timings=None):
+    """
+    Collect this thread's phase and rule timings into the yielded dict
+    ({"phases": {...}, "rules": {...}}, seconds) for a per-request breakdown.
+    Pass an earlier dict to carry on adding to it (e.g. in a response generator).
+    """
+    if timings is None:
+        timings = {"phases": {}, "rules": {}}
+    outer = getattr(_local, "timings", None)
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = outer
+
+
+def _record(kind, name, elapsed):
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings[kind][name] = timings[kind].get(name, 0.0) + elapsed
+
+
+@contextmanager
+def timed(phase):
+    """Time a phase of a check (upload_read, parse, columns, check, format, serialize, ...)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        PHASE_SECONDS.observe(elapsed, phase=phase)
+        _record("phases", phase, elapsed)
+
+
+@contextmanager
+def timed_rule(mode, rule):
+    """Time one rule family (iswc, release_info, writers, aka, artists)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        RULE_SECONDS.observe(elapsed, mode=mode, rule=rule)
+        _record("rules", rule, elapsed)
+
+
+def render():
+    return REGISTRY.render()
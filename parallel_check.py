@@ -0,0 +1,187 @@
+import io
+import os
+import posixpath
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from checker_logic import duplicate_errors, load_catalog, validate_catalog_frame
+from checker_logic_old import unreadable_file_errors
+from error_table import ErrorTable
+from rule_engine import merge_by_row
+
+# Catalogs smaller than this are checked in-process: pickling chunks to
+# workers costs more than it saves.
+PARALLEL_MIN_ROWS = 20000
+
+# Chunks per worker, so a slow chunk does not leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(workers):
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _pools[workers]
+
+
+def _discard_pool(workers, pool):
+    # a worker died (e.g. killed when out of memory): the pool is unusable,
+    # so the next check gets a new one
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(workers, func, calls):
+    """Submit func(*args) for each args in calls; returns (pool, futures). A broken pool is replaced once."""
+    pool = _pool(workers)
+    try:
+        return pool, [pool.submit(func, *args) for args in calls]
+    except BrokenProcessPool:
+        _discard_pool(workers, pool)
+        pool = _pool(workers)
+        return pool, [pool.submit(func, *args) for args in calls]
+
+
+def _check_chunk(df, check_mode):
+    # runs in a worker process; column_map() is memoized by header, so each
+    # worker resolves the catalog columns once and reuses them for every chunk.
+    # Duplicates span chunks, so the parent looks for them
+    return validate_catalog_frame(df, check_mode, cross_row=False)
+
+
+def validate_catalog_frame_parallel(df, check_mode="ALL IN ONE", workers=None, min_rows=PARALLEL_MIN_ROWS, cross_row=True):
+    """
+    validate_catalog_frame split over row chunks in a process pool.
+    Chunks keep their original index, so row numbers and the merged error
+    order are the same as a single-process check. Cross-row rules
+    (duplicates) run here on the whole frame while the workers check rows;
+    cross_row=False leaves them out.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(df) < min_rows:
+        return validate_catalog_frame(df, check_mode, cross_row=cross_row)
+
+    n_chunks = min(workers * CHUNKS_PER_WORKER, max(len(df) // 1000, 1))
+    bounds = [len(df) * k // n_chunks for k in range(n_chunks + 1)]
+    chunks = [df.iloc[a:b] for a, b in zip(bounds, bounds[1:])]
+
+    pool, futures = _submit(workers, _check_chunk, [(chunk, check_mode) for chunk in chunks])
+    try:
+        errors = ErrorTable.concat([future.result() for future in futures])
+    except BrokenProcessPool:
+        _discard_pool(workers, pool)
+        raise
+    if not cross_row:
+        return errors
+    return merge_by_row(errors, duplicate_errors(df, check_mode))
+
+
+def validate_catalog_file_parallel(file_buffer, check_mode="ALL IN ONE", workers=None, min_rows=PARALLEL_MIN_ROWS):
+    """validate_catalog_file, with the checks spread over worker processes."""
+    try:
+        df = load_catalog(file_buffer, check_mode)
+    except Exception as e:
+        if check_mode != "ALL IN ONE":
+            raise
+        return unreadable_file_errors(e)
+
+    return validate_catalog_frame_parallel(df, check_mode, workers, min_rows)
+
+
+# ---------- ARCHIVES ---------- #
+
+CATALOG_EXTENSIONS = (".xlsx", ".xls", ".csv", ".parquet")
+
+
+def archive_catalogs(source, max_files=100, max_bytes=2 * 2**30, directory=None):
+    """
+    (name, bytes) of the catalogs in a zip archive (bytes or a seekable
+    file), in archive order; with a directory, each catalog is extracted
+    to a file there instead and (name, path) returned. Folders, hidden
+    files and files of other types are skipped. Raises ValueError for a
+    bad archive or one over max_files / max_bytes (uncompressed), checked
+    before anything is extracted.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a zip archive: {e}")
+
+    with archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith("__MACOSX/")
+            and not posixpath.basename(info.filename).startswith(".")
+            and info.filename.lower().endswith(CATALOG_EXTENSIONS)
+        ]
+        if not members:
+            raise ValueError("No catalogs (.xlsx, .xls, .csv, .parquet) found in the archive")
+        if len(members) > max_files:
+            raise ValueError(f"The archive holds {len(members)} catalogs, at most {max_files} are allowed")
+        if sum(info.file_size for info in members) > max_bytes:
+            raise ValueError(f"The archive's catalogs are over {max_bytes // 2**20} MB uncompressed")
+        if directory is None:
+            return [(info.filename, archive.read(info)) for info in members]
+        files = []
+        for k, info in enumerate(members):
+            # numbered, not by member name: names may hold "../"
+            path = os.path.join(directory, f"{k}{posixpath.splitext(info.filename)[1].lower()}")
+            with archive.open(info) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            files.append((info.filename, path))
+        return files
+
+
+def _check_file(source, check_mode):
+    # runs in a worker process: parse and check one whole catalog. Parsed
+    # here, not by validate_catalog_file: in ALL IN ONE mode that reports an
+    # unreadable file as an issue, where a batch reports the file as failed
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            df = load_catalog(fh, check_mode)
+    else:
+        df = load_catalog(io.BytesIO(source), check_mode)
+    return validate_catalog_frame(df, check_mode)
+
+
+def _size(source):
+    return os.path.getsize(source) if isinstance(source, str) else len(source)
+
+
+def validate_catalogs_parallel(files, check_mode="ALL IN ONE", workers=None):
+    """
+    Check several catalogs at once, one worker process per file, at most
+    `workers` at a time. files are (name, bytes or path) pairs; paths are
+    read by the workers. Largest files start first so the batch takes about
+    as long as its slowest file. Returns one dict per file, in input order:
+    {"file", "status" (issues_found / success / failed), "count", "errors"}
+    plus "error" for a file that could not be checked.
+    """
+    workers = workers or os.cpu_count() or 1
+    order = sorted(range(len(files)), key=lambda k: -_size(files[k][1]))
+    pool, submitted = _submit(workers, _check_file, [(files[k][1], check_mode) for k in order])
+    futures = dict(zip(order, submitted))
+
+    results = []
+    for k, (name, _) in enumerate(files):
+        try:
+            errors = futures[k].result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _discard_pool(workers, pool)
+            results.append({"file": name, "status": "failed", "count": 0, "errors": ErrorTable.empty(), "error": str(e)})
+            continue
+        status = "issues_found" if errors else "success"
+        results.append({"file": name, "status": status, "count": len(errors), "errors": errors})
+    return results
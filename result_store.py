@@ -0,0 +1,332 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+
+from error_table import ErrorTable, object_array, summarize
+
+_RESULT_ID = re.compile(r"^[0-9a-f]{32}$")
+
+REPORT_COLUMNS = ["Status", "EEP Master Catalog Number", "Title", "Issues"]
+
+
+TABLE_CACHE_SIZE = 4
+CHUNK_RECORDS = 10000
+
+
+class ResultWriter:
+    """
+    Appends error batches to a stored result; the id is usable once closed.
+    Errors are written as records, [row, rule, index, detail], plus ID and
+    Title when they differ from the previous record's. A rule is declared
+    by a ["rule", template] line before its first use, the catalog of a
+    batch result by a ["file", name] line.
+
+    Counts by rule are kept as errors are added, so summary() needs no
+    read of the stored result.
+    """
+
+    def __init__(self, store, result_id, meta):
+        self.result_id = result_id
+        self.count = 0
+        self._path = store._path(result_id)
+        self._tmp = f"{self._path}.tmp"
+        self._fh = open(self._tmp, "w", encoding="utf-8")
+        self._fh.write(json.dumps(meta) + "\n")
+        self._rules = {}
+        self._owner = None
+        self._file = None
+        # per rule (in _rules order): records, message of the first one
+        self._counts = []
+        self._examples = {}
+        self._rows = []
+
+    def add(self, errors, file=None):
+        """errors is an ErrorTable or flat error dicts; file names their catalog in a batch result."""
+        if not isinstance(errors, ErrorTable):
+            errors = ErrorTable.from_dicts(errors)
+        lines = []
+        rules = []
+        for template in errors.templates:
+            if template not in self._rules:
+                self._rules[template] = len(self._rules)
+                self._counts.append(0)
+                lines.append(json.dumps(["rule", template]))
+            rules.append(self._rules[template])
+
+        counts = np.bincount(errors.rules, minlength=len(errors.templates))
+        examples = errors.examples()
+        for k in np.flatnonzero(counts).tolist():
+            self._examples.setdefault(rules[k], examples[k])
+            self._counts[rules[k]] += int(counts[k])
+        if len(errors):
+            self._rows.append(np.unique(errors.rows))
+
+        files = errors.files.tolist() if errors.files is not None else [file] * len(errors)
+        for f, row, rule, i, d, ident, title in zip(
+            files, errors.rows.tolist(), errors.rules.tolist(), errors.index.tolist(),
+            errors.detail.tolist(), errors.ids.tolist(), errors.titles.tolist(),
+        ):
+            if f != self._file:
+                self._file = f
+                lines.append(json.dumps(["file", f]))
+            record = [row, rules[rule], i, d]
+            if (ident, title) != self._owner:
+                self._owner = (ident, title)
+                record += [ident, title]
+            lines.append(json.dumps(record))
+        if lines:
+            self._fh.write("\n".join(lines) + "\n")
+        self.count += len(errors)
+
+    def summary(self):
+        """ErrorTable.summary() of the errors added so far."""
+        rows = len(np.unique(np.concatenate(self._rows))) if self._rows else 0
+        return summarize(list(self._rules), self._counts, self._examples, rows)
+
+    def close(self):
+        self._fh.close()
+        os.replace(self._tmp, self._path)
+
+    def discard(self):
+        self._fh.close()
+        os.remove(self._tmp)
+
+
+def _read_tables(fh, chunk=CHUNK_RECORDS):
+    """ErrorTables of up to chunk records each, read from a stored result after its metadata line."""
+    templates = []
+    columns = ([], [], [], [], [], [], [])
+    owner = (None, None)
+    current_file = None
+    batch = False
+
+    def table():
+        rows, rules, index, detail, ids, titles, files = columns
+        n = len(rows)
+        out = ErrorTable(
+            templates, rows, rules, index, object_array(detail, n), object_array(ids, n),
+            object_array(titles, n), object_array(files, n) if batch else None,
+        )
+        for column in columns:
+            column.clear()
+        return out
+
+    for line in fh:
+        record = json.loads(line)
+        if record[0] == "rule":
+            templates.append(record[1])
+            continue
+        if record[0] == "file":
+            current_file = record[1]
+            batch = True
+            continue
+        if len(record) > 4:
+            owner = (record[4], record[5])
+        for column, value in zip(columns, record[:4] + list(owner) + [current_file]):
+            column.append(value)
+        if len(columns[0]) >= chunk:
+            yield table()
+    if columns[0]:
+        yield table()
+
+
+class ResultStore:
+    """
+    Check results kept on disk under a random result id for ttl seconds,
+    one JSON line per error after a metadata line (see ResultWriter).
+    Errors are streamed from disk; only the few results last paged
+    through are held in memory, as compact ErrorTables.
+    """
+
+    def __init__(self, directory, ttl=3600):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, result_id):
+        return os.path.join(self.directory, f"{result_id}.ndjson")
+
+    def _rows_path(self, result_id):
+        return os.path.join(self.directory, f"{result_id}.rows.json")
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def writer(self, filename="Catalog", check_mode=None, files=None):
+        self._purge()
+        meta = {"filename": filename, "check_mode": check_mode, "created": time.time()}
+        if files is not None:
+            # a batch result: each error belongs to one of these
+            meta["files"] = files
+        return ResultWriter(self, uuid.uuid4().hex, meta)
+
+    def save(self, errors, filename="Catalog", check_mode=None, rows=None, files=None):
+        """
+        Store a complete error list; returns its result id. rows (row
+        fingerprints, see incremental.row_fingerprints) lets a later upload
+        of the revised catalog reuse these results.
+        """
+        writer = self.writer(filename, check_mode, files)
+        writer.add(errors)
+        if rows is not None:
+            tmp = f"{self._rows_path(writer.result_id)}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(rows, fh)
+            os.replace(tmp, self._rows_path(writer.result_id))
+        writer.close()
+        return writer.result_id
+
+    def _open(self, result_id):
+        if not _RESULT_ID.match(result_id or ""):
+            return None
+        path = self._path(result_id)
+        try:
+            if os.stat(path).st_mtime < time.time() - self.ttl:
+                return None
+            return open(path, encoding="utf-8")
+        except OSError:
+            return None
+
+    def meta(self, result_id):
+        """Metadata of a stored result, or None if unknown or expired."""
+        fh = self._open(result_id)
+        if fh is None:
+            return None
+        with fh:
+            return json.loads(fh.readline())
+
+    def rows(self, result_id):
+        """Row fingerprints stored with a result, or None."""
+        if self.meta(result_id) is None:
+            return None
+        try:
+            with open(self._rows_path(result_id), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def iter_errors(self, result_id):
+        """Stored errors in order as flat dicts ("File" first in a batch), or None if unknown or expired."""
+        fh = self._open(result_id)
+        if fh is None:
+            return None
+
+        def errors():
+            with fh:
+                fh.readline()
+                for table in _read_tables(fh):
+                    yield from table
+
+        return errors()
+
+    def table(self, result_id):
+        """A stored result as one ErrorTable, or None if unknown or expired."""
+        fh = self._open(result_id)
+        if fh is None:
+            return None
+        with self._lock:
+            if result_id in self._tables:
+                self._tables.move_to_end(result_id)
+                fh.close()
+                return self._tables[result_id]
+        with fh:
+            fh.readline()
+            table = ErrorTable.concat(list(_read_tables(fh)))
+        with self._lock:
+            self._tables[result_id] = table
+            while len(self._tables) > TABLE_CACHE_SIZE:
+                self._tables.popitem(last=False)
+        return table
+
+
+# ---------- XLSX REPORT ---------- #
+
+SHEET_TITLE_INVALID = re.compile(r"[\[\]:*?/\\]")
+
+
+def _add_report_sheet(wb, title):
+    ws = wb.create_sheet(title)
+
+    thin = Side(style="thin")
+    header = []
+    for name in REPORT_COLUMNS:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+        header.append(cell)
+    ws.append(header)
+    return ws
+
+
+def write_error_report(errors, fileobj):
+    """
+    Write errors as the 'Validation Issues' workbook using openpyxl's
+    write-only mode, so memory stays flat however many rows there are.
+    """
+    wb = Workbook(write_only=True)
+    ws = _add_report_sheet(wb, "Validation Issues")
+
+    for err in errors:
+        ws.append(["", err.get("ID"), err.get("Title"), err.get("Issue")])
+
+    wb.save(fileobj)
+
+
+def sheet_titles(files):
+    """A valid, unique Excel sheet title for each file name."""
+    titles = []
+    taken = set()
+    for name in files:
+        base = os.path.splitext(os.path.basename(name))[0]
+        base = SHEET_TITLE_INVALID.sub("_", base).strip("'") or "Catalog"
+        title = base[:31]
+        n = 1
+        while title.lower() in taken:
+            n += 1
+            suffix = f" ({n})"
+            title = base[:31 - len(suffix)] + suffix
+        taken.add(title.lower())
+        titles.append(title)
+    return titles
+
+
+def write_batch_report(files, errors, fileobj):
+    """The report of a batch result: one sheet per file, errors routed by their "File"."""
+    wb = Workbook(write_only=True)
+    sheets = {name: _add_report_sheet(wb, title) for name, title in zip(files, sheet_titles(files))}
+
+    for err in errors:
+        sheets[err["File"]].append(["", err.get("ID"), err.get("Title"), err.get("Issue")])
+
+    wb.save(fileobj)
+
+
+def error_report_file(errors, files=None):
+    """Report in an anonymous temp file, rewound and ready for send_file."""
+    fh = tempfile.TemporaryFile()
+    if files is None:
+        write_error_report(errors, fh)
+    else:
+        write_batch_report(files, errors, fh)
+    fh.seek(0)
+    return fh
@@ -0,0 +1,473 @@
+import contextlib
+import re
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from catalog_columns import MAX_WRITERS
+from error_table import ErrorTable, object_array
+
+
+# ---------- NORMALIZED COLUMNS ---------- #
+
+def _norm_str(v):
+    if pd.isna(v) or v is None:
+        return ""
+    return str(v).strip()
+
+
+def _factorize_text(series):
+    """
+    Normalize a column the way _norm_str does for a single cell.
+    Returns (codes, table): table holds the distinct normalized strings
+    (its last entry is always ""), codes index into it per row.
+    """
+    kind = series.dtype.kind
+    if kind == "O" and pd.api.types.infer_dtype(series, skipna=True) == "floating":
+        # cells of one type hash apart only by value
+        series = series.astype("float64")
+        kind = "f"
+    if kind == "f":
+        # 0.0 and -0.0 hash equal but print differently
+        values = series.to_numpy()
+        exact = not np.signbit(values[values == 0]).any()
+    else:
+        exact = kind in "iub" or pd.api.types.infer_dtype(series, skipna=True) in ("string", "integer", "boolean", "empty")
+
+    if exact:
+        codes, uniques = pd.factorize(series)
+        texts = [str(u).strip() for u in uniques]
+    else:
+        # mixed object columns: 1 == 1.0 == True would collapse when hashed
+        texts_per_row = [_norm_str(v) for v in series.to_numpy(dtype=object)]
+        codes, uniques = pd.factorize(np.array(texts_per_row, dtype=object))
+        texts = list(uniques)
+
+    # NA and blank cells all share the trailing "" slot; codes take the
+    # smallest integer type that fits (most columns have few distinct values)
+    remap = np.array([len(texts) if t == "" else i for i, t in enumerate(texts)] + [len(texts)])
+    table = np.array(texts + [""], dtype=object)
+    return remap.astype(np.min_scalar_type(len(texts)))[codes], table
+
+
+# CatalogCells of the frames checked inside a shared_cells() block, per thread: id(df) -> cells
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def shared_cells(cells=None):
+    """
+    Inside the block, CatalogCells.of() gives one view per frame, so every
+    check of one request normalizes a catalog once. cells (e.g. kept with
+    a cached frame) are shared from the start. Frames must not be modified
+    inside the block.
+    """
+    outer = getattr(_local, "cells", None)
+    shared = outer if outer is not None else {}
+    if cells is not None:
+        shared[id(cells.df)] = cells
+    _local.cells = shared
+    try:
+        yield
+    finally:
+        _local.cells = outer
+
+
+class CatalogCells:
+    """
+    Column-wise view of a catalog DataFrame.
+    Each column is normalized once; rules then work on whole-column arrays.
+    A missing column (None) reads as empty on every row.
+
+    CatalogCells.of(df) returns the view shared inside a shared_cells()
+    block, else a new one.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self._cols = {}
+        self._upper = {}
+        self._dropdown = {}
+
+    @classmethod
+    def of(cls, df):
+        shared = getattr(_local, "cells", None)
+        if shared is None:
+            return cls(df)
+        cells = shared.get(id(df))
+        if cells is None or cells.df is not df:
+            cells = shared[id(df)] = cls(df)
+        return cells
+
+    def nbytes(self):
+        """Memory held by the normalized columns: codes, distinct texts and their upper-case forms."""
+        arrays = [a for pair in self._cols.values() for a in pair] + list(self._upper.values())
+        arrays += [a for pair in self._dropdown.values() for a in pair]
+        total = 0
+        for a in arrays:
+            a = np.asarray(a)
+            total += a.nbytes
+            if a.dtype == object:
+                total += sum(sys.getsizeof(v) for v in a.tolist())
+        return total
+
+    def _column(self, col):
+        if col not in self._cols:
+            if col is None:
+                self._cols[col] = (np.zeros(self.n, dtype=np.intp), np.array([""], dtype=object))
+            else:
+                self._cols[col] = _factorize_text(self.df[col])
+        return self._cols[col]
+
+    def raw(self, col):
+        """Original cell values (None for a missing column)."""
+        if col is None:
+            return np.full(self.n, None, dtype=object)
+        return self.df[col].to_numpy(dtype=object)
+
+    def text(self, col):
+        codes, table = self._column(col)
+        return table[codes]
+
+    def _upper_table(self, col):
+        if col not in self._upper:
+            _, table = self._column(col)
+            self._upper[col] = np.array([t.upper() for t in table], dtype=object)
+        return self._upper[col]
+
+    def upper(self, col):
+        codes, _ = self._column(col)
+        return self._upper_table(col)[codes]
+
+    def empty(self, col):
+        codes, table = self._column(col)
+        return codes == len(table) - 1
+
+    def test(self, col, predicate):
+        """Boolean mask of predicate(normalized text), evaluated once per distinct value."""
+        codes, table = self._column(col)
+        return np.array([bool(predicate(t)) for t in table], dtype=bool)[codes]
+
+    def map(self, col, func, dtype=float):
+        """func(normalized text) per row, evaluated once per distinct value."""
+        codes, table = self._column(col)
+        return np.array([func(t) for t in table], dtype=dtype)[codes]
+
+    def dropdown(self, col):
+        """
+        A low-cardinality column as categorical codes: (codes per row,
+        categories), categories being its distinct upper-cased texts ("" for
+        blank cells).
+        """
+        if col not in self._dropdown:
+            table_codes, categories = pd.factorize(self._upper_table(col))
+            self._dropdown[col] = (table_codes.astype(np.min_scalar_type(len(categories))), categories)
+        table_codes, categories = self._dropdown[col]
+        codes, _ = self._column(col)
+        return table_codes[codes], np.asarray(categories, dtype=object)
+
+    def isin(self, col, values):
+        """Mask of rows whose upper-cased text is one of values."""
+        codes, _ = self._column(col)
+        return np.array([u in values for u in self._upper_table(col)], dtype=bool)[codes]
+
+    def lines(self, col):
+        """
+        Non-blank stripped lines of a multiline cell, as a long table:
+        (row positions, 1-based line numbers, upper-cased line text).
+        """
+        codes, table = self._column(col)
+        split = [[l.strip() for l in t.split("\n") if l.strip()] for t in table]
+        counts = np.array([len(s) for s in split], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        flat = np.array([l.upper() for s in split for l in s], dtype=object)
+
+        row_counts = counts[codes]
+        pos = np.repeat(np.arange(self.n), row_counts)
+        starts = np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        line_no = np.arange(len(pos)) - starts + 1
+        line_text = flat[np.repeat(offsets[codes], row_counts) + line_no - 1]
+        return pos, line_no, line_text
+
+
+def writer_counts(raw, empty):
+    """int(float(Writer Total)) per non-empty row, plus a mask of rows where that worked."""
+    counts = np.zeros(len(raw), dtype=np.int64)
+    valid = ~empty
+    for pos in np.flatnonzero(valid):
+        try:
+            counts[pos] = int(float(raw[pos]))
+        except:
+            valid[pos] = False
+    return counts, valid
+
+
+# ---------- WRITER TABLE ---------- #
+
+def writer_table(cells, cmap, w_count, parse_share):
+    """
+    Long-format writer data: one row per (catalog row, writer slot) for
+    slots 1..min(Writer Total, 20), built slot by slot from the
+    Composer i / Publisher i column groups.
+    Dropdown fields are upper-cased text held as categoricals, CAE is text
+    with ".0" removed, shares are parsed with parse_share.
+    """
+    loop_limit = np.minimum(w_count, MAX_WRITERS)
+    parts = []
+    dropdowns = {field: [] for field in DROPDOWN_FIELDS}
+    for i in range(1, MAX_WRITERS + 1):
+        rows = np.flatnonzero(loop_limit >= i)
+        if not len(rows) and parts:
+            break
+        w = cmap.writer(i)
+        parts.append(pd.DataFrame({
+            "row": rows,
+            "slot": i,
+            "c_share_empty": cells.empty(w["c_share"])[rows],
+            "c_share": cells.map(w["c_share"], parse_share)[rows],
+            "p_cae": cells.map(w["p_cae"], lambda v: v.replace(".0", ""), dtype=object)[rows],
+            "has_p_share": w["p_share"] is not None,
+            "p_share_empty": cells.empty(w["p_share"])[rows],
+            "p_share": cells.map(w["p_share"], parse_share)[rows],
+        }))
+        for field, slots in dropdowns.items():
+            codes, categories = cells.dropdown(w[field])
+            slots.append((codes[rows], categories))
+    table = pd.concat(parts, ignore_index=True)
+    for field, slots in dropdowns.items():
+        table[field] = _merged_categorical(slots)
+    return table
+
+
+# writer fields with a handful of values (Y/N, A/C/AC/CA, OP, publisher names...)
+DROPDOWN_FIELDS = ["c_ctrl", "c_cap", "c_link", "p_name", "p_aff", "p_cap"]
+
+
+def _merged_categorical(parts):
+    """One Categorical of (codes, categories) parts, each with its own categories."""
+    categories = pd.unique(np.concatenate([c for _, c in parts]))
+    codes = [pd.Index(categories).get_indexer(c)[k] for k, c in parts]
+    return pd.Categorical.from_codes(np.concatenate(codes), categories=pd.Index(categories, dtype=object))
+
+
+def share_totals(table, n):
+    """
+    Sum of composer shares per catalog row (empty shares count as 0).
+    Adds slot by slot, in the same order as a running per-row total.
+    """
+    shares = np.where(table["c_share_empty"], 0.0, table["c_share"])
+    return np.bincount(table["row"], weights=shares, minlength=n)
+
+
+def publisher_expectations(table, rules):
+    """
+    Join the writer table against {Linked Publisher: (Name, CAE No, Affiliation)}.
+    Returns (linked mask, name mismatch, CAE mismatch, affiliation mismatch).
+    """
+    # looked up once per Linked Publisher category, then spread by code
+    link = table["c_link"].cat
+    expected = [rules.get(c) for c in link.categories]
+    linked = np.array([e is not None for e in expected], dtype=bool)[link.codes]
+
+    def mismatch(field, k):
+        # the expected value as a code of the field's own categories (-1: none of them)
+        values = table[field].cat
+        want = values.categories.get_indexer([e[k] if e is not None else None for e in expected])
+        return linked & (values.codes.to_numpy() != want[link.codes])
+
+    exp_cae = np.array([e[1] if e is not None else None for e in expected], dtype=object)[link.codes]
+    return (
+        linked,
+        mismatch("p_name", 0),
+        linked & (table["p_cae"].to_numpy() != exp_cae),
+        mismatch("p_aff", 2),
+    )
+
+
+# ---------- CROSS-ROW RULES ---------- #
+# Rules comparing rows with each other. Their messages start with
+# CROSS_ROW_PREFIX, so callers that check rows apart (chunks, reused
+# results) can tell them from per-row messages.
+
+CROSS_ROW_PREFIX = "Duplicate "
+
+
+def identifier_text(text):
+    """A cell's identifier as shown in messages: numeric codes read as float lose their ".0"."""
+    if text.endswith(".0") and text[:-2].isdigit():
+        return text[:-2]
+    return text
+
+
+def identifier_key(text):
+    """An identifier as compared between rows: upper-case letters and digits only."""
+    return "".join(ch for ch in identifier_text(text).upper() if ch.isalnum())
+
+
+# What an identifier looks like once upper-cased (dashes or spaces may
+# separate its parts). Other text in an identifier column, such as notes,
+# placeholders or a dotted ISWC, is not an identifier and never a duplicate.
+IDENTIFIER_SHAPES = {
+    "ISWC": re.compile(r"T[- ]?\d{9}[- ]?\d"),
+    "ISRC": re.compile(r"[A-Z]{2}[- ]?[A-Z0-9]{3}[- ]?\d{2}[- ]?\d{5}"),
+    "UPC": re.compile(r"\d{12,14}"),
+}
+
+
+def looks_like_identifier(kind, text):
+    """Does a cell's text have the shape of a kind identifier (see IDENTIFIER_SHAPES)?"""
+    return IDENTIFIER_SHAPES[kind].fullmatch(identifier_text(text).upper()) is not None
+
+
+class DuplicateIndex:
+    """
+    The row each identifier first appeared on, per kind (ISRC, ISWC, ...).
+    Fed a catalog in row order, whole or batch by batch, it finds repeats
+    in one pass with a hash lookup per distinct value.
+    """
+
+    def __init__(self):
+        self._first = {}
+
+    def earlier_rows(self, kind, keys, row_numbers):
+        """
+        Per row, the row number of an earlier row with the same key, or 0
+        (blank keys never match). Remembers where new keys first appeared.
+        """
+        first = self._first.setdefault(kind, {})
+        row_numbers = np.asarray(row_numbers)
+        codes, uniques = pd.factorize(keys)
+        _, first_pos = np.unique(codes, return_index=True)
+        earlier = row_numbers[first_pos]
+        for k, key in enumerate(uniques.tolist()):
+            earlier[k] = first.setdefault(key, int(earlier[k])) if key else 0
+        earlier = earlier[codes]
+        earlier[earlier == row_numbers] = 0
+        return earlier
+
+
+def add_duplicate_hits(cells, hits, col, kind, index, skip=None):
+    """
+    Rows repeating an identifier in col from an earlier row. Only values
+    shaped like a kind identifier are compared; skip(text) exempts more.
+    """
+    if not col or not cells.n:
+        return
+
+    def key(v):
+        if not looks_like_identifier(kind, v) or (skip and skip(v)):
+            return ""
+        return identifier_key(v)
+
+    keys = cells.map(col, key, dtype=object)
+    earlier = index.earlier_rows(kind, keys, cells.df.index.to_numpy() + 2)
+    pos = np.flatnonzero(earlier)
+    hits.add_rows(
+        pos, f"{CROSS_ROW_PREFIX}{kind} {{d}}: already used on row {{i}}",
+        index=earlier[pos], detail=cells.map(col, identifier_text, dtype=object)[pos],
+    )
+
+
+# ---------- RULE HITS ---------- #
+
+class RuleHits:
+    """
+    Collects (row position, message template, index, detail) for failing
+    rows only; see ErrorTable for how messages are formatted.
+    Rules must be added in the order a per-row check would emit them;
+    output is ordered by row, then by that rule order. Inside a
+    per_slot() block, writer-table rules order by slot first.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.templates = []
+        self._template_ids = {}
+        self._pos = []
+        self._rule = []
+        self._index = []
+        self._detail = []
+        self._key = []
+        self._seq = 0
+        self._block = None
+
+    @contextlib.contextmanager
+    def per_slot(self):
+        self._block = self._seq
+        try:
+            yield
+        finally:
+            self._block = None
+
+    def add(self, mask, message):
+        self.add_rows(np.flatnonzero(mask), message)
+
+    def add_rows(self, positions, template, slots=None, index=None, detail=None):
+        """
+        template is formatted with {i} = index (the slot by default, else 0)
+        and {d} = detail; each is one value for all rows or an array aligned
+        with positions.
+        """
+        seq = self._seq
+        self._seq += 1
+        n = len(positions)
+        if n == 0:
+            return
+        if template not in self._template_ids:
+            self._template_ids[template] = len(self.templates)
+            self.templates.append(template)
+        if index is None:
+            index = 0 if slots is None else slots
+        self._pos.append(np.asarray(positions))
+        self._rule.append(np.full(n, self._template_ids[template]))
+        self._index.append(np.broadcast_to(np.asarray(index, dtype=np.int64), (n,)))
+        self._detail.append(object_array(detail, n))
+        block = seq if self._block is None else self._block
+        self._key.append((
+            np.full(n, block),
+            np.zeros(n, dtype=np.intp) if slots is None else np.asarray(slots),
+            np.full(n, seq),
+        ))
+
+    def add_slots(self, table, mask, template):
+        """Writer-table rule: template is formatted with the slot number as {i}."""
+        mask = np.asarray(mask, dtype=bool)
+        self.add_rows(table["row"].to_numpy()[mask], template, slots=table["slot"].to_numpy()[mask])
+
+    def sorted(self):
+        """(positions, rules, index, detail) in output order; rules index self.templates."""
+        if not self._pos:
+            nothing = np.zeros(0, dtype=np.intp)
+            return nothing, nothing, nothing, np.zeros(0, dtype=object)
+        pos = np.concatenate(self._pos)
+        block, slot, seq = (np.concatenate(k) for k in zip(*self._key))
+        order = np.lexsort((seq, slot, block, pos))
+        return (
+            pos[order], np.concatenate(self._rule)[order],
+            np.concatenate(self._index)[order], np.concatenate(self._detail)[order],
+        )
+
+
+def format_errors(df, hits, ids, titles):
+    """ErrorTable of the hits with Excel row numbers; ids and titles are per row position."""
+    pos, rules, index, detail = hits.sorted()
+    return ErrorTable(
+        hits.templates, df.index.to_numpy()[pos] + 2, rules, index, detail,
+        np.asarray(ids, dtype=object)[pos], np.asarray(titles, dtype=object)[pos],
+    )
+
+
+def merge_by_row(*error_lists):
+    """
+    Merge row-ordered errors (format_errors tables or flat error lists)
+    into one table; a row's errors from earlier lists come first.
+    """
+    return ErrorTable.merge_by_row(error_lists)
+
+
+def is_cross_row(errors):
+    """Per record of an ErrorTable: was it found by comparing rows (see CROSS_ROW_PREFIX)?"""
+    return errors.rule_mask(lambda template: template.startswith(CROSS_ROW_PREFIX))
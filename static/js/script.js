@@ -9,9 +9,15 @@ document.addEventListener("DOMContentLoaded", () => {
   const tableBody = document.getElementById("validationTableBody");
   const downloadBtn = document.getElementById("downloadErrorsBtn");
   const closeIconBtn = document.getElementById("closeIconBtn");
+  const scrollBox = document.getElementById("validationScroll");
+  const ruleFilter = document.getElementById("ruleFilter");
+  const rowFrom = document.getElementById("rowFrom");
+  const rowTo = document.getElementById("rowTo");
+  const applyFilterBtn = document.getElementById("applyFilterBtn");
+  const resultCount = document.getElementById("resultCount");
 
-  let currentErrors = [];
   let currentFilename = "Catalog";
+  let currentResultId = null; // server-side copy of the last result
 
   // --- Modal Functions ---
   const openModal = () => {
@@ -31,36 +37,213 @@ document.addEventListener("DOMContentLoaded", () => {
     if (e.target === modal) closeModal();
   });
 
-  // --- Render Errors to Table ---
-  function showErrors(errors) {
-    tableBody.innerHTML = "";
+  // --- Results Table (virtualized) ---
+  // Only the rows in view (plus a few either side) are in the DOM; the
+  // stored result is fetched page by page from /results/<id> as rows
+  // scroll into view, filtered server-side by rule and row range.
+  const ROW_HEIGHT = 64; // px: every row is an ID/Title line and an issue line
+  const PAGE_SIZE = 200; // errors per /results request
+  const OVERSCAN = 10; // rows rendered beyond each edge of the view
+  const MAX_PAGES = 50; // pages kept in memory, farthest from the view dropped first
 
-    errors.forEach((err) => {
-      const tr = document.createElement("tr");
-      tr.className =
-        "border-b border-gray-100 last:border-0 hover:bg-gray-50 transition";
+  let view = null; // {resultId, query, total, pages, pending, generation}
+  let generation = 0;
+  let renderQueued = false;
 
-      tr.innerHTML = `
-                <td class="py-3 px-2 align-top text-center">
+  function resetErrors() {
+    tableBody.replaceChildren();
+    resultCount.textContent = "";
+    currentResultId = null;
+    view = null;
+  }
+
+  function errorRow(err) {
+    const tr = document.createElement("tr");
+    tr.className = "border-b border-gray-100 hover:bg-gray-50 transition";
+    tr.style.height = `${ROW_HEIGHT}px`;
+
+    const icon = document.createElement("td");
+    icon.className = "pt-2 px-2 align-top text-center";
+    const cell = document.createElement("td");
+    cell.className = "pt-2 px-2 text-gray-700 font-medium text-sm leading-6 align-top";
+    tr.append(icon, cell);
+
+    if (!err) {
+      cell.className += " text-gray-400";
+      cell.textContent = "Loading...";
+      return tr;
+    }
+    icon.innerHTML = `
                     <svg class="w-6 h-6 text-red-500 inline-block" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                         <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"></path>
-                    </svg>
-                </td>
-                <td class="py-3 px-2 text-gray-700 font-medium text-sm leading-6">
-                    <div class="flex flex-col">
-                        <span>
-                            <span class="font-bold text-gray-900 bg-gray-200 px-1 rounded text-xs mr-2">${err.ID}</span>
-                            <span class="font-semibold text-blue-700">${err.Title}</span>
-                        </span>
-                        <span class="mt-1 text-red-600">${err.Issue}</span>
-                    </div>
-                </td>
-            `;
-      tableBody.appendChild(tr);
+                    </svg>`;
+
+    // error text is set as text, never parsed as HTML
+    const header = document.createElement("div");
+    header.className = "truncate";
+    const id = document.createElement("span");
+    id.className = "font-bold text-gray-900 bg-gray-200 px-1 rounded text-xs mr-2";
+    id.textContent = err.ID;
+    const title = document.createElement("span");
+    title.className = "font-semibold text-blue-700";
+    title.textContent = err.Title;
+    header.append(id, title);
+
+    const issue = document.createElement("div");
+    issue.className = "truncate text-red-600";
+    issue.textContent = err.Issue;
+    issue.title = err.Issue;
+
+    cell.append(header, issue);
+    return tr;
+  }
+
+  // stands in for the rows above or below the rendered ones
+  function spacerRow(height) {
+    const tr = document.createElement("tr");
+    const td = document.createElement("td");
+    td.colSpan = 2;
+    td.className = "p-0";
+    tr.style.height = `${height}px`;
+    tr.append(td);
+    return tr;
+  }
+
+  function filterQuery() {
+    const params = new URLSearchParams();
+    if (ruleFilter.value) params.append("rule", ruleFilter.value);
+    if (rowFrom.value) params.append("row_from", rowFrom.value);
+    if (rowTo.value) params.append("row_to", rowTo.value);
+    return params;
+  }
+
+  async function fetchPage(page) {
+    if (!view || view.pages.has(page) || view.pending.has(page)) return;
+    const current = view;
+    current.pending.add(page);
+
+    const params = new URLSearchParams(current.query);
+    params.set("offset", page * PAGE_SIZE);
+    params.set("limit", PAGE_SIZE);
+    try {
+      const response = await fetch(`/results/${current.resultId}?${params}`);
+      const body = await response.json();
+      if (!response.ok) throw new Error(body.error || "Could not load results");
+      if (current.generation !== generation) return; // filter changed meanwhile
+
+      current.total = body.total;
+      current.pages.set(page, body.errors);
+      dropFarPages(page);
+      queueRender();
+    } catch (error) {
+      console.error(error);
+      if (current.generation === generation) resultCount.textContent = error.message;
+    } finally {
+      current.pending.delete(page);
+    }
+  }
+
+  function dropFarPages(near) {
+    while (view.pages.size > MAX_PAGES) {
+      let farthest = near;
+      view.pages.forEach((_, page) => {
+        if (Math.abs(page - near) > Math.abs(farthest - near)) farthest = page;
+      });
+      view.pages.delete(farthest);
+    }
+  }
+
+  function render() {
+    renderQueued = false;
+    if (!view) return;
+
+    const total = view.total;
+    const first = Math.max(0, Math.floor(scrollBox.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const last = Math.min(
+      total,
+      Math.ceil((scrollBox.scrollTop + scrollBox.clientHeight) / ROW_HEIGHT) + OVERSCAN
+    );
+
+    const rows = [spacerRow(first * ROW_HEIGHT)];
+    for (let k = first; k < last; k++) {
+      const page = Math.floor(k / PAGE_SIZE);
+      const errors = view.pages.get(page);
+      if (!errors) fetchPage(page);
+      rows.push(errorRow(errors ? errors[k - page * PAGE_SIZE] : null));
+    }
+    rows.push(spacerRow((total - last) * ROW_HEIGHT));
+    tableBody.replaceChildren(...rows);
+
+    resultCount.textContent = `${total} issue${total === 1 ? "" : "s"}`;
+  }
+
+  function queueRender() {
+    if (!renderQueued) {
+      renderQueued = true;
+      requestAnimationFrame(render);
+    }
+  }
+
+  // (Re)load the table for the current filters, starting at the top
+  function loadView() {
+    if (!currentResultId) return;
+    generation += 1;
+    view = {
+      resultId: currentResultId,
+      query: filterQuery().toString(),
+      total: 0,
+      pages: new Map(),
+      pending: new Set(),
+      generation,
+    };
+    scrollBox.scrollTop = 0;
+    tableBody.replaceChildren();
+    resultCount.textContent = "Loading...";
+    fetchPage(0);
+  }
+
+  // Rule choices come from the result's summary (counts by rule)
+  function showResults(resultId, summary) {
+    currentResultId = resultId;
+    ruleFilter.replaceChildren(new Option(`All issues (${summary.count})`, ""));
+    summary.rules.forEach((rule) => {
+      ruleFilter.append(new Option(`${rule.label} (${rule.count})`, rule.rule));
     });
+    rowFrom.value = "";
+    rowTo.value = "";
+    loadView();
     openModal();
   }
 
+  scrollBox.addEventListener("scroll", queueRender);
+  window.addEventListener("resize", queueRender);
+  ruleFilter.addEventListener("change", loadView);
+  applyFilterBtn.addEventListener("click", loadView);
+  [rowFrom, rowTo].forEach((input) =>
+    input.addEventListener("keydown", (e) => {
+      if (e.key === "Enter") loadView();
+    })
+  );
+
+  // --- Read an NDJSON response line by line as it arrives ---
+  async function readEvents(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+
+      const lines = buffer.split("\n");
+      buffer = lines.pop();
+      lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line)));
+
+      if (done) break;
+    }
+    if (buffer.trim()) onEvent(JSON.parse(buffer));
+  }
+
   // --- Form Submission ---
   form.addEventListener("submit", async (e) => {
     e.preventDefault();
@@ -78,34 +261,60 @@ document.addEventListener("DOMContentLoaded", () => {
 
     try {
       const formData = new FormData(form);
+      // counts by rule at the end instead of every error: the table pages through them
+      formData.append("summary", "1");
 
-      // 3. Send Request
-      const response = await fetch("/check_catalog", {
+      // 3. Send Request (progress streams back while the catalog is checked)
+      const response = await fetch("/check_catalog_stream", {
         method: "POST",
         body: formData,
       });
 
-      // 4. Handle Response
-      const result = await response.json();
-
-      statusDiv.classList.remove("hidden");
-
       if (!response.ok) {
+        const result = await response.json().catch(() => ({}));
         throw new Error(result.error || "Unknown Server Error");
       }
 
+      resetErrors();
+      statusDiv.classList.remove("hidden");
+      statusDiv.classList.add(
+        "bg-blue-50",
+        "text-blue-700",
+        "border",
+        "border-blue-200"
+      );
+      statusDiv.textContent = "Checking catalog...";
+
+      // 4. Handle Events
+      let result = null;
+      await readEvents(response, (event) => {
+        if (event.event === "progress") {
+          const rows = event.total
+            ? `${event.rows} of ${event.total}`
+            : `${event.rows}`;
+          statusDiv.textContent = `Checked ${rows} rows, ${event.issues} issues so far...`;
+        } else if (event.event === "error") {
+          throw new Error(event.error);
+        } else if (event.event === "done") {
+          result = event;
+        }
+      });
+
+      if (!result) throw new Error("The check ended unexpectedly");
+      currentResultId = result.result_id || null;
+      if (result.status === "issues_found") showResults(result.result_id, result.summary);
+
+      statusDiv.className = "mt-6 p-4 rounded-md text-center font-medium";
+
       if (result.status === "issues_found") {
         // FAILURE CASE (Issues found)
-        currentErrors = result.errors;
-        showErrors(result.errors);
-
         statusDiv.classList.add(
           "bg-red-50",
           "text-red-700",
           "border",
           "border-red-200"
         );
-        statusDiv.innerHTML = `<strong>Attention:</strong> Found ${result.errors.length} issues in your catalog.`;
+        statusDiv.innerHTML = `<strong>Attention:</strong> Found ${result.count} issues in your catalog.`;
       } else {
         // SUCCESS CASE
         statusDiv.classList.add(
@@ -119,7 +328,7 @@ document.addEventListener("DOMContentLoaded", () => {
     } catch (error) {
       // ERROR CASE
       console.error(error);
-      statusDiv.classList.remove("hidden");
+      statusDiv.className = "mt-6 p-4 rounded-md text-center font-medium";
       statusDiv.classList.add(
         "bg-red-100",
         "text-red-800",
@@ -141,14 +350,9 @@ document.addEventListener("DOMContentLoaded", () => {
     downloadBtn.disabled = true;
 
     try {
-      const response = await fetch("/download_errors", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          errors: currentErrors,
-          filename: currentFilename,
-        }),
-      });
+      // The whole stored result, whatever the table is filtered to
+      if (!currentResultId) throw new Error("No result to download");
+      const response = await fetch(`/download_errors/${currentResultId}`);
 
       if (!response.ok) throw new Error("Download failed");
 
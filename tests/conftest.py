@@ -0,0 +1,20 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client whose uploads, caches and results live in tmp_path."""
+    import app as app_module
+
+    monkeypatch.setitem(app_module.app.config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setitem(app_module.app.config, "IDENTIFIER_DB", "")
+    for name in ("_job_queue", "_catalog_cache", "_result_store", "_identifier_history"):
+        monkeypatch.setattr(app_module, name, None)
+    return app_module.app.test_client()
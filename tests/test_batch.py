@@ -0,0 +1,43 @@
+import io
+import zipfile
+
+from synthetic_catalog import catalog_frame, write_catalog_xlsx
+
+
+def _archive(**members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def _check(client, data, **form):
+    form.update({"check_type": "ALL IN ONE", "catalog_archive": (io.BytesIO(data), "catalogs.zip")})
+    return client.post("/check_batch", data=form)
+
+
+def test_batch_reports_each_file(client):
+    clean = io.BytesIO()
+    write_catalog_xlsx(clean, 10, error_rate=0, seed=1)
+    faulty = catalog_frame(10, error_rate=0.5, seed=2).to_csv(index=False).encode()
+    data = _archive(**{"a/clean.xlsx": clean.getvalue(), "faulty.csv": faulty, "corrupt.xlsx": b"PK\x03\x04 broken", "notes.txt": b"x"})
+
+    body = _check(client, data).get_json()
+    files = {f["file"]: f for f in body["files"]}
+    assert list(files) == ["a/clean.xlsx", "faulty.csv", "corrupt.xlsx"]
+    assert files["a/clean.xlsx"]["status"] == "success"
+    assert files["faulty.csv"]["status"] == "issues_found"
+    assert files["faulty.csv"]["count"] == len(files["faulty.csv"]["errors"]) > 0
+    assert files["corrupt.xlsx"]["status"] == "failed"
+    assert files["corrupt.xlsx"]["error"]
+    assert body["status"] == "failed"
+    assert body["count"] == files["faulty.csv"]["count"]
+
+    report = client.get(f"/download_errors/{body['result_id']}")
+    assert report.status_code == 200
+
+
+def test_batch_rejects_bad_archives(client):
+    assert _check(client, b"not a zip").status_code == 400
+    assert _check(client, _archive(**{"notes.txt": b"x"})).status_code == 400
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import catalog_stream
+from catalog_cache import CatalogCache
+from checker_logic import MODE_RULES, column_plan
+from synthetic_catalog import catalog_frame, write_catalog_xlsx
+
+
+def _workbook():
+    buf = io.BytesIO()
+    write_catalog_xlsx(buf, 40, error_rate=0.3, seed=5)
+    return buf.getvalue()
+
+
+def _stream(client, data, check_type):
+    form = {"check_type": check_type, "catalog_file": (io.BytesIO(data), "catalog.xlsx")}
+    lines = [json.loads(line) for line in client.post("/check_catalog_stream", data=form).data.splitlines()]
+    assert lines[-1]["event"] == "done"
+    return [e for line in lines if line["event"] == "errors" for e in line["errors"]]
+
+
+def _count_reads(monkeypatch):
+    reads = []
+    read = catalog_stream.iter_catalog_batches
+
+    def counting(*args, **kwargs):
+        reads.append(args)
+        return read(*args, **kwargs)
+
+    monkeypatch.setattr(catalog_stream, "iter_catalog_batches", counting)
+    return reads
+
+
+def test_all_in_one_plan_covers_every_mode():
+    # a catalog read for ALL IN ONE is reused by the other modes
+    names = catalog_frame(2).columns
+    everything = column_plan("ALL IN ONE")
+    for mode in MODE_RULES:
+        assert all(everything.wants(c) for c in names if column_plan(mode).wants(c))
+
+
+def test_stream_reuses_catalog_in_another_mode(client, monkeypatch):
+    data = _workbook()
+    reads = _count_reads(monkeypatch)
+
+    _stream(client, data, "ALL IN ONE")
+    assert len(reads) == 1
+    # second mode: batched from the cached catalog, not read again
+    errors = _stream(client, data, "ISWC")
+    assert len(reads) == 1
+
+    expected = client.post("/check_catalog", data={"check_type": "ISWC", "catalog_file": (io.BytesIO(data), "catalog.xlsx")})
+    assert errors == expected.get_json()["errors"]
+
+
+def test_stream_reuses_checked_catalog(client, monkeypatch):
+    data = _workbook()
+    reads = _count_reads(monkeypatch)
+
+    client.post("/check_catalog", data={"check_type": "ALL IN ONE", "catalog_file": (io.BytesIO(data), "catalog.xlsx")})
+    _stream(client, data, "METADATA")
+    assert reads == []
+
+
+@pytest.mark.parametrize("spilled", [b"", b"not a pickle", b"\x80\x04\x95\x10\x00"])
+def test_unreadable_spill_file_is_a_miss(tmp_path, spilled):
+    cache = CatalogCache(max_bytes=0, spill_dir=str(tmp_path))
+    df = catalog_frame(5, seed=1)
+    cache.put("k", df)
+    path = tmp_path / "k.pkl"
+    assert path.exists()
+
+    path.write_bytes(spilled)
+    assert cache.get("k") is None
+    assert not path.exists()
+
+    parsed = []
+    loaded = cache.load(b"catalog", parse=lambda buf: parsed.append(1) or df, key="k")
+    pd.testing.assert_frame_equal(loaded, df)
+    assert parsed == [1]
+    # spilled again
+    assert os.path.exists(path)
@@ -0,0 +1,57 @@
+import gc
+import weakref
+
+from catalog_cache import CatalogCache
+from checker_logic import validate_catalog_frame
+from rule_engine import CatalogCells, shared_cells
+from synthetic_catalog import catalog_frame
+
+
+def test_cells_are_shared_inside_a_block_only():
+    df = catalog_frame(20, seed=1)
+    assert CatalogCells.of(df) is not CatalogCells.of(df)
+    with shared_cells():
+        cells = CatalogCells.of(df)
+        assert CatalogCells.of(df) is cells
+        assert CatalogCells.of(df.copy()) is not cells
+        with shared_cells():
+            assert CatalogCells.of(df) is cells
+    assert CatalogCells.of(df) is not cells
+
+
+def test_edited_frame_is_checked_again():
+    df = catalog_frame(20, error_rate=0, seed=1)
+    assert validate_catalog_frame(df, "ISWC") == []
+    df.loc[0, "ISWC"] = "T-1.2.3"
+    assert len(validate_catalog_frame(df, "ISWC")) == 1
+
+
+def test_frame_is_freed_after_a_check():
+    df = catalog_frame(200, error_rate=0.3, seed=2)
+    ref = weakref.ref(df)
+    with shared_cells():
+        validate_catalog_frame(df, "ALL IN ONE")
+    del df
+    gc.collect()
+    assert ref() is None
+
+
+def test_cache_keeps_and_counts_cells():
+    cache = CatalogCache(max_bytes=2**30)
+    df = catalog_frame(500, error_rate=0.3, seed=3)
+    cache.put("k", df)
+    frame_bytes = cache._bytes
+    cells = cache.cells(df)
+    assert cells is cache.cells(df)
+    assert cache.cells(df.copy()) is None
+
+    with shared_cells(cells):
+        validate_catalog_frame(df, "ALL IN ONE")
+    cache.refresh(df)
+    assert cells.nbytes() > 0
+    assert cache._bytes == frame_bytes + cells.nbytes()
+
+    # over budget once the cells are counted: no longer kept in memory
+    cache.max_bytes = frame_bytes + 1
+    cache.refresh(df)
+    assert cache.get("k") is None
@@ -0,0 +1,85 @@
+import datetime
+import io
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import catalog_reader
+from catalog_reader import read_catalog
+from catalog_stream import iter_catalog_batches
+from synthetic_catalog import write_catalog_xlsx
+
+
+def _workbook():
+    buf = io.BytesIO()
+    write_catalog_xlsx(buf, 120, error_rate=0.3, seed=8)
+    return buf.getvalue()
+
+
+def _odd_workbook():
+    # blank rows inside and after the data, an error cell, a date, a fraction
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["EEP Master Catalog Number", "Title", "ISWC", "", "Title"])
+    ws.append(["A1", "Song", "#N/A", None, 1.5])
+    ws.append([])
+    ws.append(["A2", datetime.datetime(2024, 5, 1), 7, "x", None])
+    ws.append([])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+@pytest.fixture(params=["parser", "public"])
+def reader(request, monkeypatch):
+    if request.param == "public":
+        # as if openpyxl's private row parser had moved
+        monkeypatch.setattr(catalog_reader, "_RowParser", None)
+    return request.param
+
+
+@pytest.mark.parametrize("make", [_workbook, _odd_workbook])
+@pytest.mark.parametrize("usecols", [None, lambda name: "TITLE" in name.upper()])
+def test_batches_match_read_excel(reader, make, usecols):
+    data = make()
+    # the first column is always read
+    keep = usecols and (lambda name: name == "EEP Master Catalog Number" or usecols(name))
+    expected = pd.read_excel(io.BytesIO(data), usecols=keep, dtype=object)
+
+    whole = list(iter_catalog_batches(io.BytesIO(data), batch_size=10**6, usecols=usecols))
+    pd.testing.assert_frame_equal(pd.concat(whole), expected)
+
+    batches = list(iter_catalog_batches(io.BytesIO(data), batch_size=7, usecols=usecols))
+    pd.testing.assert_frame_equal(pd.concat(batches), expected)
+
+
+def _cells(df):
+    return [["missing" if pd.isna(v) else (type(v).__name__, v) for v in row] for row in df.itertuples(index=False)]
+
+
+def test_batches_read_cells_like_whole_file(reader):
+    # columns whose type read_excel would infer from other rows: an int
+    # next to blanks (1.0), ints next to a bool (True), numeric text (5)
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["EEP Master Catalog Number", "Share", "Flag", "Code", "Mixed"])
+    ws.append(["A1", 50, True, "007", 2.5])
+    ws.append(["A2", None, 1, "5", "x"])
+    ws.append(["A3", 25, 0, "NA", 3])
+    ws.append(["A4", 12.5, False, 8, None])
+    buf = io.BytesIO()
+    wb.save(buf)
+    data = buf.getvalue()
+
+    whole = read_catalog(io.BytesIO(data))
+    assert _cells(whole) == [
+        [("str", "A1"), ("int", 50), ("bool", True), ("str", "007"), ("float", 2.5)],
+        [("str", "A2"), "missing", ("int", 1), ("str", "5"), ("str", "x")],
+        [("str", "A3"), ("int", 25), ("int", 0), "missing", ("int", 3)],
+        [("str", "A4"), ("float", 12.5), ("bool", False), ("int", 8), "missing"],
+    ]
+    for batch_size in (1, 2, 3):
+        batches = pd.concat(iter_catalog_batches(io.BytesIO(data), batch_size=batch_size))
+        pd.testing.assert_frame_equal(batches, whole)
+        assert _cells(batches) == _cells(whole)
@@ -0,0 +1,37 @@
+import pytest
+
+from cli import EXIT_FAILED, EXIT_ISSUES, EXIT_OK, main
+from synthetic_catalog import catalog_frame, write_catalog_xlsx
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    clean = tmp_path / "clean.xlsx"
+    write_catalog_xlsx(str(clean), 20, error_rate=0, seed=1)
+    faulty = tmp_path / "faulty.csv"
+    catalog_frame(20, error_rate=0.5, seed=2).to_csv(faulty, index=False)
+    corrupt = tmp_path / "corrupt.xlsx"
+    corrupt.write_bytes(b"PK\x03\x04 not really a workbook")
+    return {"clean": str(clean), "faulty": str(faulty), "corrupt": str(corrupt)}
+
+
+@pytest.mark.parametrize("mode", ["ALL IN ONE", "ISWC"])
+def test_exit_status(catalogs, mode, capsys):
+    args = ["--mode", mode, "--workers", "1", "--quiet"]
+    assert main([catalogs["clean"]] + args) == EXIT_OK
+    assert main([catalogs["corrupt"]] + args) == EXIT_FAILED
+    assert main([catalogs["clean"], catalogs["corrupt"]] + args) == EXIT_FAILED
+    if mode == "ALL IN ONE":
+        assert main([catalogs["faulty"]] + args) == EXIT_ISSUES
+        assert main([catalogs["clean"], catalogs["faulty"]] + args) == EXIT_ISSUES
+
+
+def test_corrupt_file_is_reported_as_failed(catalogs, capsys):
+    main([catalogs["corrupt"], catalogs["clean"], "--workers", "1"])
+    summary = capsys.readouterr().err
+    assert f"{catalogs['corrupt']}: failed" in summary
+    assert f"{catalogs['clean']}: success" in summary
+
+
+def test_missing_path(tmp_path, capsys):
+    assert main([str(tmp_path / "nothing.xlsx")]) == EXIT_FAILED
@@ -0,0 +1,25 @@
+from checker_logic import validate_catalog_frame
+from synthetic_catalog import catalog_frame
+
+
+def _duplicates(df, mode="ALL IN ONE"):
+    return [err["Issue"] for err in validate_catalog_frame(df, mode) if "Duplicate" in err["Issue"]]
+
+
+def test_placeholders_are_not_duplicates():
+    df = catalog_frame(10, error_rate=0, seed=5)
+    df.loc[[2, 6], "ISWC"] = "Notes: pending"
+    df.loc[[3, 7], "Recording ISRC"] = "TBC"
+    df.loc[[4, 8], "ISWC"] = "T-123.456.789-0"
+    assert _duplicates(df) == []
+
+
+def test_repeated_identifiers_are_duplicates():
+    df = catalog_frame(10, error_rate=0, seed=5)
+    df.loc[6, "ISWC"] = df.loc[2, "ISWC"].replace("-", "")
+    df.loc[7, "Recording ISRC"] = df.loc[3, "Recording ISRC"].lower()
+    for mode in ("ALL IN ONE", "DUPLICATES"):
+        assert _duplicates(df, mode) == [
+            f"Row 8: Duplicate ISWC {df.loc[6, 'ISWC']}: already used on row 4",
+            f"Row 9: Duplicate ISRC {df.loc[7, 'Recording ISRC']}: already used on row 5",
+        ]
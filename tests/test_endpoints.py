@@ -0,0 +1,115 @@
+import io
+import json
+
+from openpyxl import load_workbook
+
+from error_table import ROW_ISSUE
+from synthetic_catalog import write_catalog_xlsx
+
+
+def _catalog(rows=60, seed=4):
+    buf = io.BytesIO()
+    write_catalog_xlsx(buf, rows, error_rate=0.4, seed=seed)
+    return buf.getvalue()
+
+
+def _check(client, data, check_type="ALL IN ONE", **fields):
+    fields.update({"check_type": check_type, "catalog_file": (io.BytesIO(data), "catalog.xlsx")})
+    return client.post("/check_catalog", data=fields)
+
+
+def _sheet_values(response):
+    book = load_workbook(io.BytesIO(response.data), read_only=True)
+    return [list(ws.iter_rows(values_only=True)) for ws in book.worksheets]
+
+
+def test_results_filters_and_summary(client):
+    body = _check(client, _catalog()).get_json()
+    errors, result_id = body["errors"], body["result_id"]
+
+    summary = client.get(f"/results/{result_id}/summary").get_json()
+    assert summary["count"] == len(errors)
+    assert sum(r["count"] for r in summary["rules"]) == len(errors)
+    assert _check(client, _catalog(), summary="1").get_json()["summary"] == {
+        k: v for k, v in summary.items() if k != "result_id"
+    }
+
+    rule = summary["rules"][0]
+    page = client.get(f"/results/{result_id}?rule={rule['rule']}&limit=1000").get_json()
+    assert page["total"] == rule["count"] == len(page["errors"])
+
+    rows = client.get(f"/results/{result_id}?row_from=10&row_to=20&limit=1000").get_json()["errors"]
+    assert rows == [e for e in errors if 10 <= int(ROW_ISSUE.match(e["Issue"]).group(1)) <= 20]
+
+    compact = client.get(f"/results/{result_id}?format=compact&limit=5").get_json()["compact"]
+    assert len(compact["issues"]) == 5
+
+    assert client.get(f"/results/{result_id}?limit=0").status_code == 400
+    assert client.get(f"/results/{result_id}?format=xml").status_code == 400
+    assert client.get(f"/results/{'0' * 32}").status_code == 404
+    assert client.get("/results/not-an-id/summary").status_code == 404
+
+
+def test_download_report_by_id(client):
+    body = _check(client, _catalog()).get_json()
+    stored = client.get(f"/download_errors/{body['result_id']}")
+    posted = client.post("/download_errors", json={"errors": body["errors"], "filename": "catalog.xlsx"})
+    assert stored.status_code == posted.status_code == 200
+    assert _sheet_values(stored) == _sheet_values(posted)
+    assert client.get(f"/download_errors/{'0' * 32}").status_code == 404
+
+
+def test_timings_and_metrics(client):
+    body = _check(client, _catalog(), "DROPDOWN", timings="1").get_json()
+    assert {"upload_read", "parse", "check"} <= set(body["timings"]["phases"])
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'endpoint="check_catalog",mode="DROPDOWN",status="issues_found"' in metrics
+    assert 'mode="DROPDOWN",rule="writers"' in metrics
+
+
+def test_spooled_and_oversized_uploads(client, monkeypatch):
+    import app as app_module
+
+    data = _catalog()
+    expected = _check(client, data).get_json()["errors"]
+    # spooled to disk after the first byte
+    monkeypatch.setitem(app_module.app.config, "UPLOAD_SPOOL_BYTES", 1)
+    assert _check(client, data).get_json()["errors"] == expected
+
+    monkeypatch.setitem(app_module.app.config, "MAX_CONTENT_LENGTH", 1000)
+    assert _check(client, data).status_code == 413
+
+
+def test_unreadable_upload(client):
+    # the all-in-one checker reports it as an issue, other modes fail
+    body = _check(client, b"PK\x03\x04 not a workbook").get_json()
+    assert body["status"] == "issues_found"
+    assert body["errors"][0]["Issue"].startswith("System Error: Could not read Excel file.")
+    assert _check(client, b"PK\x03\x04 not a workbook", "ISWC").status_code == 500
+
+    form = {"check_type": "ISWC", "catalog_file": (io.BytesIO(b"PK\x03\x04 not a workbook"), "catalog.xlsx")}
+    last = json.loads(client.post("/check_catalog_stream", data=form).data.splitlines()[-1])
+    assert last["event"] == "error"
+
+
+def test_jobs_queue_limits(client, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setitem(app_module.app.config, "JOB_QUEUE_DEPTH", 0)
+    try:
+        assert client.get(f"/jobs/{'0' * 32}").status_code == 404
+        form = {"check_type": "ISWC", "catalog_file": (io.BytesIO(_catalog(5)), "catalog.xlsx")}
+        response = client.post("/jobs", data=form)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+    finally:
+        app_module.get_job_queue().shutdown()
+
+
+def test_benchmark_engines_agree(tmp_path):
+    import run_benchmarks
+
+    argv = ["--rows", "40", "--modes", "ALL IN ONE", "ISWC", "--engines", "serial", "stream",
+            "--repeat", "1", "--no-memory", "--cache-dir", str(tmp_path)]
+    assert run_benchmarks.main(argv) == 0
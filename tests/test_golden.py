@@ -0,0 +1,114 @@
+"""
+Every checker and endpoint against the errors the baseline checker
+(checker_logic.validate_catalog_file at commit 1206024) reported for
+data/golden_catalog.xlsx, in each of its modes. The workbook is a
+synthetic catalog with injected faults plus cells typed unlike the rest
+of their column and blank rows inside the data.
+"""
+import io
+import json
+import os
+import time
+
+import pytest
+
+from catalog_reader import read_catalog
+from catalog_stream import iter_catalog_errors
+from checker_logic import load_catalog, validate_catalog_file
+from parallel_check import validate_catalog_frame_parallel
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+with open(os.path.join(DATA, "golden_errors.json"), encoding="utf-8") as fh:
+    GOLDEN = json.load(fh)
+with open(os.path.join(DATA, "golden_catalog.xlsx"), "rb") as fh:
+    CATALOG = fh.read()
+
+MODES = list(GOLDEN)
+
+
+def _form(check_type, **fields):
+    fields.update({"check_type": check_type, "catalog_file": (io.BytesIO(CATALOG), "golden_catalog.xlsx")})
+    return fields
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_checker(mode):
+    assert validate_catalog_file(io.BytesIO(CATALOG), mode) == GOLDEN[mode]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_stream(mode):
+    assert list(iter_catalog_errors(io.BytesIO(CATALOG), mode, batch_size=7)) == GOLDEN[mode]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_parallel(mode):
+    df = load_catalog(io.BytesIO(CATALOG), mode)
+    assert validate_catalog_frame_parallel(df, mode, workers=2, min_rows=1) == GOLDEN[mode]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_other_formats(fmt):
+    # the same sheet converted; CSV and Parquet type their columns, so only
+    # modes whose messages do not quote cell values are compared exactly
+    buf = io.BytesIO()
+    df = read_catalog(io.BytesIO(CATALOG)).astype(str).replace("nan", "")
+    if fmt == "csv":
+        df.to_csv(buf, index=False)
+    else:
+        df.to_parquet(buf, index=False)
+    for mode in ("ISWC", "METADATA"):
+        assert validate_catalog_file(io.BytesIO(buf.getvalue()), mode) == GOLDEN[mode]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_check_catalog(client, mode):
+    body = client.post("/check_catalog", data=_form(mode)).get_json()
+    assert body["status"] == ("issues_found" if GOLDEN[mode] else "success")
+    assert body.get("errors", []) == GOLDEN[mode]
+
+    # the stored result pages back the same errors
+    result_id = body["result_id"]
+    paged = []
+    while len(paged) < len(GOLDEN[mode]):
+        page = client.get(f"/results/{result_id}?offset={len(paged)}&limit=20").get_json()
+        assert page["total"] == len(GOLDEN[mode])
+        paged += page["errors"]
+    assert paged == GOLDEN[mode]
+
+
+def test_check_catalog_every_mode_from_cache(client):
+    # modes after the first are served from the cached parse
+    for mode in MODES:
+        assert client.post("/check_catalog", data=_form(mode)).get_json().get("errors", []) == GOLDEN[mode]
+    for mode in reversed(MODES):
+        assert client.post("/check_catalog", data=_form(mode)).get_json().get("errors", []) == GOLDEN[mode]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_check_catalog_stream(client, mode):
+    lines = [json.loads(line) for line in client.post("/check_catalog_stream", data=_form(mode)).data.splitlines()]
+    errors = [e for line in lines if line["event"] == "errors" for e in line["errors"]]
+    done = lines[-1]
+    assert errors == GOLDEN[mode]
+    assert done["event"] == "done" and done["count"] == len(GOLDEN[mode])
+    assert client.get(f"/results/{done['result_id']}?limit=1000").get_json()["errors"] == GOLDEN[mode]
+
+
+def test_jobs(client):
+    import app as app_module
+
+    job_ids = {mode: client.post("/jobs", data=_form(mode)).get_json()["job_id"] for mode in MODES}
+    try:
+        for mode, job_id in job_ids.items():
+            deadline = time.time() + 120
+            while True:
+                body = client.get(f"/jobs/{job_id}").get_json()
+                if body["status"] in ("done", "failed") or time.time() > deadline:
+                    break
+                time.sleep(0.1)
+            assert body["status"] == "done"
+            assert body["result"].get("errors", []) == GOLDEN[mode]
+    finally:
+        app_module.get_job_queue().shutdown()
@@ -0,0 +1,56 @@
+import io
+
+from identifier_history import IdentifierHistory, catalog_identifiers
+from synthetic_catalog import catalog_frame
+
+
+def _record(history, df, source):
+    found = catalog_identifiers(df)
+    errors = history.collisions(df, source, found)
+    history.record(found, source)
+    return [err["Issue"] for err in errors]
+
+
+def test_resent_and_revised_catalogs_do_not_collide(tmp_path):
+    history = IdentifierHistory(str(tmp_path / "ids.sqlite3"))
+    df = catalog_frame(40, error_rate=0, seed=6)
+    assert _record(history, df, "Label Jan") == []
+    assert _record(history, df.copy(), "Label Feb") == []
+
+    revised = df.copy()
+    revised.loc[5, "EEP Master Catalog Number"] = "NEW-TRACK"
+    revised.loc[5, "Album UPC"] = df.loc[4, "Album UPC"]
+    assert [issue for issue in _record(history, revised, "Label Mar") if "UPC" in issue] == []
+
+
+def test_identifiers_of_other_works_collide(tmp_path):
+    history = IdentifierHistory(str(tmp_path / "ids.sqlite3"))
+    df = catalog_frame(10, error_rate=0, seed=6)
+    _record(history, df, "Label A")
+
+    other = catalog_frame(10, error_rate=0, seed=9)
+    other.loc[0, "ISWC"] = df.loc[3, "ISWC"]
+    other.loc[1, "Album UPC"] = df.loc[3, "Album UPC"]
+    assert _record(history, other, "Label B") == [
+        f"Row 2: Duplicate ISWC {df.loc[3, 'ISWC']}: registered to {df.loc[3, 'EEP Master Catalog Number']} in Label A",
+        f"Row 3: Duplicate Album UPC {int(df.loc[3, 'Album UPC'])}: already used in Label A",
+    ]
+
+
+def test_history_needs_a_source(client, tmp_path, monkeypatch):
+    import app as app_module
+
+    monkeypatch.setitem(app_module.app.config, "IDENTIFIER_DB", str(tmp_path / "ids.sqlite3"))
+    first = catalog_frame(10, error_rate=0, seed=6)
+    second = catalog_frame(10, error_rate=0, seed=9)
+    second.loc[0, "ISWC"] = first.loc[3, "ISWC"]
+
+    def check(df, name, **form):
+        data = {"check_type": "DUPLICATES", "catalog_file": (io.BytesIO(df.to_csv(index=False).encode()), name)}
+        data.update(form)
+        return client.post("/check_catalog", data=data).get_json()
+
+    check(first, "Jan.csv")
+    assert check(second, "Feb.csv")["status"] == "success"
+    check(first, "Jan.csv", source="Label A")
+    assert check(second, "Feb.csv", source="Label B")["status"] == "issues_found"
@@ -0,0 +1,38 @@
+import io
+
+from incremental import diff_issues
+from synthetic_catalog import catalog_frame
+
+
+def _check(client, df, **form):
+    data = {"check_type": "ISWC", "catalog_file": (io.BytesIO(df.to_csv(index=False).encode()), "catalog.csv")}
+    data.update(form)
+    return client.post("/check_catalog", data=data).get_json()
+
+
+def _issues(errors):
+    return sorted(err["Issue"] for err in errors)
+
+
+def test_diff_issues_reads_generators():
+    before = [{"ID": "1", "Title": "A", "Issue": "Row 2: gone"}, {"ID": "2", "Title": "B", "Issue": "Row 3: kept"}]
+    after = [{"ID": "2", "Title": "B", "Issue": "Row 4: kept"}, {"ID": "3", "Title": "C", "Issue": "Row 5: added"}]
+    changes = diff_issues(iter(before), iter(after))
+    assert changes == {"new": after[1:], "resolved": before[:1], "unchanged": after[:1]}
+
+
+def test_recheck_reports_resolved_new_and_unchanged_issues(client):
+    df = catalog_frame(3, error_rate=0, seed=4)
+    df.loc[0, "ISWC"] = "T-123.456.789-0"
+    df.loc[1, "ISWC"] = "T-123.456.789-1"
+    baseline = _check(client, df)
+    assert len(baseline["errors"]) == 2
+
+    revised = df.copy()
+    revised.loc[1, "ISWC"] = "T-912345678-0"
+    revised.loc[2, "ISWC"] = "Notes: pending"
+    changes = _check(client, revised, baseline_result_id=baseline["result_id"])["changes"]
+
+    assert _issues(changes["unchanged"]) == _issues(baseline["errors"][:1])
+    assert _issues(changes["resolved"]) == _issues(baseline["errors"][1:])
+    assert [err["Issue"].split(":")[0] for err in changes["new"]] == ["Row 4"]
@@ -0,0 +1,13 @@
+import io
+
+from synthetic_catalog import catalog_frame
+
+
+def test_unknown_modes_share_one_label(client):
+    data = catalog_frame(5, error_rate=0, seed=1).to_csv(index=False).encode()
+    for mode in ("ISWC", "bogus-1", "bogus-2"):
+        client.post("/check_catalog", data={"check_type": mode, "catalog_file": (io.BytesIO(data), "c.csv")})
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert 'mode="ISWC"' in metrics
+    assert 'mode="unknown"' in metrics
+    assert "bogus" not in metrics
@@ -0,0 +1,34 @@
+import io
+import json
+
+from checker_logic import validate_catalog_frame
+from result_store import ResultStore
+from rule_engine import DuplicateIndex
+from synthetic_catalog import catalog_frame, write_catalog_xlsx
+
+
+def test_writer_summary_matches_stored_result(tmp_path):
+    df = catalog_frame(300, error_rate=0.3, seed=6)
+    store = ResultStore(str(tmp_path))
+    writer = store.writer(check_mode="ALL IN ONE")
+    seen = DuplicateIndex()
+    for start in range(0, len(df), 70):
+        writer.add(validate_catalog_frame(df.iloc[start:start + 70], "ALL IN ONE", seen=seen))
+    writer.add([])
+    writer.close()
+
+    summary = writer.summary()
+    assert summary["count"] == writer.count > 0
+    assert summary == store.table(writer.result_id).summary()
+
+
+def test_stream_summary_does_not_load_result(client, monkeypatch):
+    buf = io.BytesIO()
+    write_catalog_xlsx(buf, 40, error_rate=0.3, seed=7)
+    monkeypatch.setattr(ResultStore, "table", lambda self, result_id: None)
+
+    form = {"check_type": "ALL IN ONE", "summary": "1", "catalog_file": (io.BytesIO(buf.getvalue()), "catalog.xlsx")}
+    done = json.loads(client.post("/check_catalog_stream", data=form).data.splitlines()[-1])
+
+    assert done["event"] == "done"
+    assert done["summary"]["count"] == done["count"] > 0
@@ -0,0 +1,76 @@
+"""
+Uploaded files are spooled to disk as they arrive instead of being read
+into memory: up to UPLOAD_SPOOL_BYTES stay in memory, larger ones go to
+an anonymous temp file in UPLOAD_FOLDER, which the parsers then read in
+place. The content hash the catalog cache is keyed on is taken while the
+upload is written, so nothing re-reads it.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+from flask import Request, current_app
+
+from catalog_cache import content_key
+
+
+class HashingSpool(tempfile.SpooledTemporaryFile):
+    """A SpooledTemporaryFile that keeps the sha256 and size of what is written to it."""
+
+    def __init__(self, max_size, dir=None):
+        super().__init__(max_size=max_size, mode="w+b", dir=dir)
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._sha256.update(data)
+        self.size += len(data)
+        return super().write(data)
+
+    def content_key(self):
+        return self._sha256.hexdigest()
+
+
+class UploadRequest(Request):
+    """Request whose file fields are HashingSpools in the app's UPLOAD_FOLDER."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        return HashingSpool(config["UPLOAD_SPOOL_BYTES"], dir=config["UPLOAD_FOLDER"])
+
+
+def upload_stream(file):
+    """A FileStorage's stream, rewound: (stream, content key, size in bytes)."""
+    stream = file.stream
+    stream.seek(0)
+    if isinstance(stream, HashingSpool):
+        return stream, stream.content_key(), stream.size
+    # not spooled by UploadRequest: hash it in chunks instead
+    key = content_key(stream)
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return stream, key, size
+
+
+def take_upload(file):
+    """
+    upload_stream, with the stream detached from the request: it stays open
+    after the view returns (e.g. for a streamed response) and the caller
+    must close it.
+    """
+    upload = upload_stream(file)
+    file.stream = io.BytesIO()
+    return upload
+
+
+def save_upload(file, directory):
+    """Copy an upload to a new file in directory (kept, e.g. for another process); returns its path."""
+    stream, _, _ = upload_stream(file)
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix, dir=directory)
+    with os.fdopen(fd, "wb") as fh:
+        shutil.copyfileobj(stream, fh)
+    stream.seek(0)
+    return path